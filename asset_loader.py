@@ -0,0 +1,60 @@
+# asset_loader.py
+import threading
+
+class AssetLoader:
+    """
+    Runs deferred asset loading tasks on a background thread so the menu can appear
+    before every sprite sheet and sound effect has been decoded.
+    Tasks are plain callables; their return values are kept by name.
+    """
+    def __init__(self):
+        self._tasks = []
+        self._results = {}
+        self._completed = 0
+        self._thread = None
+        self._done_event = threading.Event()
+
+    def add_task(self, name, load_func):
+        """Queues a loading task. Tasks must be added before start()."""
+        if self._thread is not None:
+            raise RuntimeError("Cannot add loading tasks after the loader has started.")
+        self._tasks.append((name, load_func))
+
+    def start(self):
+        """Starts the background worker. Does nothing if it is already running."""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="AssetLoader", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        for name, load_func in self._tasks:
+            try:
+                self._results[name] = load_func()
+            except Exception as e:
+                print(f"Warning: Background loading task '{name}' failed: {e}")
+                self._results[name] = None
+            self._completed += 1
+        self._done_event.set()
+
+    @property
+    def progress(self):
+        """Fraction of the queued tasks that have finished, between 0.0 and 1.0."""
+        return self._completed / len(self._tasks) if self._tasks else 1.0
+
+    def is_done(self):
+        return self._done_event.is_set() or not self._tasks
+
+    def wait(self):
+        """Blocks until every task has finished, running them here if the worker was never started."""
+        if self.is_done():
+            return
+        if self._thread is None:
+            self._run()
+            return
+        self._done_event.wait()
+
+    def get(self, name, default=None):
+        """Returns the result of a finished task, or default if it has not finished or failed."""
+        result = self._results.get(name)
+        return default if result is None else result
@@ -0,0 +1,151 @@
+# balance.py
+import argparse
+import os
+import sys
+import time
+from collections import deque
+from multiprocessing import Pool
+import pygame
+from benchmark import percentile
+from level_controller import LevelController, LEVEL_CONFIG
+from simulation import Simulation, SIMULATION_STEP
+
+DEFAULT_RUNS = 1000 # Simulated playthroughs per level
+DEFAULT_MAX_TIME = 120.0 # Seconds of game time before a run counts as a timeout
+BOT_STEPS = ((pygame.K_UP, "up", 0, -1), (pygame.K_DOWN, "down", 0, 1),
+             (pygame.K_LEFT, "left", -1, 0), (pygame.K_RIGHT, "right", 1, 0))
+BOT_RETRY_TIME = 0.5 # Seconds the bot waits before searching again when no NPC is reachable
+TASKS_PER_CHUNK_DIVISOR = 8 # Aim for about this many chunks of runs per worker, to keep the pool balanced
+
+# --- Scripted Bot ---
+
+class ScriptedBot:
+    """
+    A simple aggressive player: walks the shortest path to the nearest cell next to a live NPC,
+    turns to face it and attacks until it dies. A Simulation controller, see Simulation.run().
+    """
+    def __init__(self):
+        self.retry_time = 0.0
+
+    def __call__(self, sim):
+        player = sim.player
+        if player.is_grid_moving or player.is_attacking or player.is_dead or sim.time < self.retry_time:
+            return # Busy (input is ignored mid-move or mid-attack), or waiting to search again
+        step = self._next_step(sim.maze, player)
+        if step is None:
+            # No NPC is reachable right now; wait for one to come closer
+            self.retry_time = sim.time + BOT_RETRY_TIME
+            return
+        key, direction, attack = step
+        if attack and player.facing_direction == direction:
+            key = pygame.K_SPACE
+        # Tapped rather than held, so the player never breaks into a run past the target
+        sim.press(key)
+        sim.release(key)
+
+    def _next_step(self, maze, player):
+        """
+        Breadth-first search from the player for the closest cell beside a live NPC.
+        Returns (key, direction, attack) for the first step of the way, or None.
+        attack is True when the player already stands beside the NPC and key faces it.
+        """
+        start = (player.grid_x, player.grid_y)
+        first_steps = {start: None}
+        queue = deque((start,))
+        while queue:
+            x, y = queue.popleft()
+            for key, direction, dx, dy in BOT_STEPS:
+                occupant = maze.get_occupant(x + dx, y + dy)
+                if occupant is not None and occupant is not player and not occupant.is_dead:
+                    if (x, y) == start:
+                        return key, direction, True
+                    return first_steps[(x, y)] + (False,)
+            for key, direction, dx, dy in BOT_STEPS:
+                cell = (x + dx, y + dy)
+                if cell in first_steps or not maze.is_walkable(*cell) or maze.get_occupant(*cell):
+                    continue
+                first_steps[cell] = first_steps[(x, y)] or (key, direction)
+                queue.append(cell)
+        return None
+
+# --- Worker Processes ---
+
+_level_controller = None
+
+def _init_worker(map_file):
+    """Loads the map once per worker and silences the game's console output."""
+    global _level_controller
+    sys.stdout = open(os.devnull, 'w')
+    _level_controller = LevelController(map_file)
+
+def run_playthrough(task):
+    """Plays one seeded run of a level with the scripted bot. Returns (level, outcome, time, damage taken)."""
+    level_number, seed, max_ticks = task
+    sim = Simulation.from_level(level_number, _level_controller, seed=seed)
+    sim.run(ScriptedBot(), max_ticks=max_ticks)
+    outcome = "win" if sim.won else "loss" if sim.lost else "timeout"
+    return level_number, outcome, sim.time, sim.player.max_health - sim.player.health
+
+# --- Report ---
+
+def summarize(results):
+    """Aggregates run_playthrough results into per-level statistics."""
+    by_level = {}
+    for level_number, outcome, game_time, damage in results:
+        by_level.setdefault(level_number, []).append((outcome, game_time, damage))
+
+    summary = {}
+    for level_number, runs in sorted(by_level.items()):
+        clear_times = sorted(game_time for outcome, game_time, _ in runs if outcome == "win")
+        damages = [damage for _, _, damage in runs]
+        summary[level_number] = {
+            'runs': len(runs),
+            'win_rate': len(clear_times) / len(runs),
+            'loss_rate': sum(1 for run in runs if run[0] == "loss") / len(runs),
+            'timeout_rate': sum(1 for run in runs if run[0] == "timeout") / len(runs),
+            # None if the level was never cleared
+            'clear_time_p50': percentile(clear_times, 50) if clear_times else None,
+            'clear_time_p90': percentile(clear_times, 90) if clear_times else None,
+            'mean_damage': sum(damages) / len(damages),
+            'max_damage': max(damages),
+        }
+    return summary
+
+def _format_clear_time(seconds):
+    return f"{'-':>10}" if seconds is None else f"{seconds:>9.1f}s"
+
+def print_report(summary):
+    print(f"{'level':>5} {'npcs':>5} {'runs':>6} {'win':>7} {'loss':>7} {'timeout':>8}"
+          f" {'clear p50':>10} {'clear p90':>10} {'damage':>7} {'max':>4}")
+    for level_number, stats in summary.items():
+        npc_count = LEVEL_CONFIG.get(level_number, {}).get('npc_count', 0)
+        print(f"{level_number:>5} {npc_count:>5} {stats['runs']:>6} {stats['win_rate']:>7.1%} {stats['loss_rate']:>7.1%}"
+              f" {stats['timeout_rate']:>8.1%} {_format_clear_time(stats['clear_time_p50'])} {_format_clear_time(stats['clear_time_p90'])}"
+              f" {stats['mean_damage']:>7.2f} {stats['max_damage']:>4}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Monte Carlo level balance report: plays seeded headless runs of each level with a scripted bot.")
+    parser.add_argument("--levels", type=int, nargs="+", help="levels to simulate (default: all levels in the map file)")
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS, help=f"runs per level (default: {DEFAULT_RUNS})")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first run; run i uses seed + i (default: 0)")
+    parser.add_argument("--max-time", type=float, default=DEFAULT_MAX_TIME, help=f"game seconds before a run times out (default: {DEFAULT_MAX_TIME:.0f})")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="worker processes (default: one per CPU)")
+    parser.add_argument("--map", default="map.txt", help="map file (default: map.txt)")
+    args = parser.parse_args()
+
+    levels = args.levels or sorted(LevelController(args.map, progress_file=os.devnull).levels)
+    max_ticks = int(args.max_time / SIMULATION_STEP)
+    # Interleaved by run, so every chunk mixes quick and slow levels
+    tasks = [(level_number, args.seed + run, max_ticks) for run in range(args.runs) for level_number in levels]
+    chunksize = max(1, len(tasks) // (args.workers * TASKS_PER_CHUNK_DIVISOR))
+
+    start = time.perf_counter()
+    with Pool(args.workers, initializer=_init_worker, initargs=(args.map,)) as pool:
+        results = list(pool.imap_unordered(run_playthrough, tasks, chunksize))
+    elapsed = time.perf_counter() - start
+
+    print_report(summarize(results))
+    print(f"{len(results)} runs on {args.workers} workers in {elapsed:.1f} s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# benchmark.py
+import argparse
+import contextlib
+import io
+import time
+from headless import init_headless
+
+SCREEN_SIZE = (1000, 700)
+PERCENTILES = (50, 90, 95, 99)
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-pct * len(sorted_values) // 100))
+    return sorted_values[int(rank) - 1]
+
+def run_benchmark(level_number, frames, warmup, seed, simulate):
+    """
+    Renders frames of GameplayState.draw offscreen. Returns the draw times in milliseconds and the
+    mean NPCScheduler.lod_counts over the measured frames (None without simulate, or if the NPCs are batched).
+    """
+    target = init_headless(SCREEN_SIZE)
+    # Imported after init_headless so nothing touches the display before the dummy driver is set up
+    from game_manager import GameplayState, FLOOR_BACKGROUND_COLOR
+    from level_controller import LevelController
+
+    sounds = {'win': None, 'lose': None, 'click': None}
+    state = GameplayState(target, LevelController(), level_number, sounds, seed=seed)
+    if state.done:
+        raise SystemExit(f"Level {level_number} could not be loaded.")
+
+    draw_times = []
+    scheduler = state.maze.npc_scheduler if simulate else None
+    lod_totals = dict.fromkeys(scheduler.lod_counts, 0) if scheduler else None
+    for frame in range(warmup + frames):
+        if simulate:
+            state.update(1 / 60)
+        start = time.perf_counter()
+        target.fill(FLOOR_BACKGROUND_COLOR)
+        state.draw(target)
+        elapsed = (time.perf_counter() - start) * 1000.0
+        if frame >= warmup:
+            draw_times.append(elapsed)
+            if scheduler:
+                for tier, count in scheduler.lod_counts.items():
+                    lod_totals[tier] += count
+    lod_means = {tier: total / frames for tier, total in lod_totals.items()} if scheduler else None
+    return draw_times, lod_means
+
+def main():
+    parser = argparse.ArgumentParser(description="Offscreen frame-render benchmark for GameplayState.draw.")
+    parser.add_argument("--level", type=int, default=1, help="level number to load (default: 1)")
+    parser.add_argument("--frames", type=int, default=600, help="number of measured frames (default: 600)")
+    parser.add_argument("--warmup", type=int, default=30, help="frames rendered before measuring (default: 30)")
+    parser.add_argument("--seed", type=int, default=0, help="random seed for NPC spawns and behaviour (default: 0)")
+    parser.add_argument("--static", action="store_true", help="do not run GameplayState.update between frames")
+    parser.add_argument("--verbose", action="store_true", help="show the game's own console output")
+    args = parser.parse_args()
+
+    output = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+    with output:
+        draw_times, lod_means = run_benchmark(args.level, args.frames, args.warmup, args.seed, not args.static)
+
+    ordered = sorted(draw_times)
+    print(f"level {args.level}: {len(ordered)} frames, mean {sum(ordered) / len(ordered):.3f} ms/frame")
+    print("  " + "  ".join(f"p{pct} {percentile(ordered, pct):.3f}" for pct in PERCENTILES) + f"  max {ordered[-1]:.3f} ms")
+    if lod_means:
+        print("  NPCs per frame: " + "  ".join(f"{tier} {count:.1f}" for tier, count in lod_means.items()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# camera.py
+import math
+
+CAMERA_FOLLOW_SPEED = 6.0 # How quickly the view catches up with its target, per second
+
+class Camera:
+    """
+    A scrolling view onto a maze. x and y are the maze coordinates of the top-left corner of
+    the screen. Along an axis where the maze fits on screen the view stays centred, otherwise
+    it follows its target smoothly and is clamped to the maze edges.
+    """
+    def __init__(self, view_width, view_height, world_width, world_height, follow_speed=CAMERA_FOLLOW_SPEED):
+        self.view_width, self.view_height = view_width, view_height
+        self.world_width, self.world_height = world_width, world_height
+        self.follow_speed = follow_speed
+        self.x, self.y = self._clamp(0.0, 0.0)
+        self.prev_x, self.prev_y = self.x, self.y # Position at the last save_render_state(), for interpolation
+
+    def _clamp_axis(self, value, view_size, world_size):
+        if world_size <= view_size:
+            return (world_size - view_size) / 2.0
+        return min(max(value, 0.0), world_size - view_size)
+
+    def _clamp(self, x, y):
+        return (self._clamp_axis(x, self.view_width, self.world_width),
+                self._clamp_axis(y, self.view_height, self.world_height))
+
+    def center_on(self, target_x, target_y):
+        """Jumps straight to the target, e.g. when a level starts."""
+        self.x, self.y = self.target_view(target_x, target_y)
+        self.prev_x, self.prev_y = self.x, self.y
+
+    def target_view(self, target_x, target_y):
+        """Returns the (x, y) the view settles at when following the target."""
+        return self._clamp(target_x - self.view_width / 2.0, target_y - self.view_height / 2.0)
+
+    def follow(self, target_x, target_y, dt):
+        """Moves the view part of the way towards centring the target."""
+        goal_x, goal_y = self.target_view(target_x, target_y)
+        blend = min(1.0, dt * self.follow_speed)
+        self.x += (goal_x - self.x) * blend
+        self.y += (goal_y - self.y) * blend
+
+    def save_render_state(self):
+        """Remembers the current view as the one render interpolation starts from. Call before each update."""
+        self.prev_x, self.prev_y = self.x, self.y
+
+    @property
+    def offset_x(self):
+        """Screen x of the maze origin. Whole pixels keep tiles and sprites from drifting apart."""
+        return math.floor(-self.x)
+
+    @property
+    def offset_y(self):
+        return math.floor(-self.y)
+
+    def get_offset(self, alpha=1.0):
+        """Returns (offset_x, offset_y) with the view alpha of the way from its previous position to the current one."""
+        if alpha >= 1.0:
+            return self.offset_x, self.offset_y
+        return (math.floor(-(self.prev_x + (self.x - self.prev_x) * alpha)),
+                math.floor(-(self.prev_y + (self.y - self.prev_y) * alpha)))
+
+    def visible_range(self, start, cell_size, cell_extent, count, view_start, view_size):
+        """
+        Returns (first, last + 1) of the cells along one axis whose pixels overlap the view.
+        Cell i covers [start + i * cell_size, start + i * cell_size + cell_extent).
+        """
+        first = math.floor((view_start - start - cell_extent) / cell_size) + 1
+        last = math.ceil((view_start + view_size - start) / cell_size)
+        return max(first, 0), min(last, count)
@@ -0,0 +1,60 @@
+# chunk_cache.py
+from collections import OrderedDict
+
+class ChunkCache:
+    """
+    Least-recently-used cache of rendered map chunks, bounded by a memory budget in bytes.
+
+    Chunks are rendered on first request by render_chunk(key), which returns (chunk, size_in_bytes).
+    Call end_frame() once per frame: it evicts the least recently used chunks until the cache
+    fits the budget again, but never a chunk that was used during the current frame.
+    """
+    def __init__(self, render_chunk, budget_bytes):
+        self.render_chunk = render_chunk
+        self.budget_bytes = budget_bytes
+        self._chunks = OrderedDict() # key -> (chunk, size_in_bytes, frame last used)
+        self._frame = 0
+        self.bytes_used = 0
+        self.hits, self.misses, self.evictions = 0, 0, 0
+
+    def get(self, key):
+        entry = self._chunks.get(key)
+        if entry is None:
+            self.misses += 1
+            chunk, size = self.render_chunk(key)
+            self.bytes_used += size
+        else:
+            if entry[2] == self._frame:
+                return entry[0] # Already used (and moved to the back) this frame
+            self.hits += 1
+            chunk, size = entry[0], entry[1]
+            self._chunks.move_to_end(key)
+        self._chunks[key] = (chunk, size, self._frame)
+        return chunk
+
+    def end_frame(self):
+        while self.bytes_used > self.budget_bytes and self._chunks:
+            key, (_, size, last_used) = next(iter(self._chunks.items()))
+            if last_used == self._frame:
+                break # Everything left is on screen; allow the overshoot rather than thrash
+            del self._chunks[key]
+            self.bytes_used -= size
+            self.evictions += 1
+        self._frame += 1
+
+    def discard(self, key):
+        entry = self._chunks.pop(key, None)
+        if entry is not None:
+            self.bytes_used -= entry[1]
+
+    def clear(self):
+        self._chunks.clear()
+        self.bytes_used = 0
+
+    def __len__(self):
+        return len(self._chunks)
+
+    def get_stats(self):
+        """Returns the cache counters and current memory use."""
+        return {"chunks": len(self._chunks), "bytes_used": self.bytes_used, "budget_bytes": self.budget_bytes,
+                "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
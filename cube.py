@@ -9,6 +9,30 @@ GRID_SIZE = 80
 DEFAULT_DARK_BORDER = (30, 30, 30)
 DEFAULT_LIGHT_BORDER = (220, 220, 220)
 FRONT_FACE_SHADOW_ALPHA = 75
+TILE_HEIGHT = int(GRID_SIZE * 1.2) # Top face plus front face, the full footprint of one cube
+
+# --- Tile Codes ---
+# Each cube type has a one-byte code, so a Maze can keep its layout in a compact bytearray
+# (Maze.tile_codes) and answer queries with bitmask tests instead of isinstance checks.
+TILE_EMPTY, TILE_FLOOR, TILE_WALL, TILE_ROCK, TILE_WOOD = range(5) # TILE_EMPTY pads short map rows
+
+# Tile property flags
+TILE_WALKABLE = 1 << 0
+TILE_FLY_OVER = 1 << 1 # Obstacles a flying NPC (demon) may cross
+TILE_SPAWNABLE = 1 << 2
+
+# Wall adjacency bits, set in a wall's tile variant for each neighbouring wall (see Maze.wall_masks)
+WALL_LEFT, WALL_UP, WALL_RIGHT, WALL_DOWN = 1 << 0, 1 << 1, 1 << 2, 1 << 3
+
+# Flags of each tile code, indexed by code. Padded to 256 entries so it also works as a
+# bytes.translate() table, turning a whole tile code grid into a flag grid in one call.
+TILE_FLAGS = bytes([
+    0,                              # TILE_EMPTY
+    TILE_WALKABLE | TILE_SPAWNABLE, # TILE_FLOOR
+    0,                              # TILE_WALL
+    TILE_FLY_OVER,                  # TILE_ROCK
+    TILE_FLY_OVER,                  # TILE_WOOD
+]).ljust(256, b'\0')
 
 # --- Texture Loading (remains the same) ---
 def load_texture(filename, fallback_color):
@@ -23,10 +47,23 @@ def load_texture(filename, fallback_color):
         surface.fill(fallback_color)
         return surface
 
-floor_texture_base = load_texture('2.png', (60, 95, 110))
-wall_texture_base = load_texture('Wall.png', (170, 170, 170))
-rock_texture_base = load_texture('Rock.png', (150, 150, 150))
-wood_texture_base = load_texture('Wood.png', (160, 110, 70))
+# Textures are loaded on first use rather than at import time, so importing this module stays cheap.
+TEXTURE_FILES = {
+    'floor': ('2.png', (60, 95, 110)),
+    'wall': ('Wall.png', (170, 170, 170)),
+    'rock': ('Rock.png', (150, 150, 150)),
+    'wood': ('Wood.png', (160, 110, 70)),
+}
+_base_textures = {}
+
+def get_base_texture(name):
+    """Returns one of the base cube textures ('floor', 'wall', 'rock', 'wood'), loading it once."""
+    texture = _base_textures.get(name)
+    if texture is None:
+        filename, fallback_color = TEXTURE_FILES[name]
+        texture = load_texture(filename, fallback_color)
+        _base_textures[name] = texture
+    return texture
 
 # --- Helper function for border colors (as defined above) ---
 def get_derived_border_colors(texture_surface, default_dark_color=DEFAULT_DARK_BORDER, default_light_color=DEFAULT_LIGHT_BORDER):
@@ -53,7 +90,37 @@ def get_derived_border_colors(texture_surface, default_dark_color=DEFAULT_DARK_B
         print(f"Warning: Could not get average color for border derivation: {e}. Using default border colors.")
         return default_dark_color, default_light_color
 
+# --- Tile Atlas ---
+# Every distinct tile look is rendered once (scaled faces, shadow and borders baked in)
+# and cached here, keyed by (cube type, variant). Values are (surface, (offset_x, offset_y)).
+# The variant is whatever the cube's look depends on beyond its type, e.g. a wall's adjacency bits.
+_tile_atlas = {}
+
+def get_tile(cube, variant=0):
+    """Returns the pre-rendered atlas tile for a cube, rendering it on first use."""
+    key = (type(cube), variant)
+    tile = _tile_atlas.get(key)
+    if tile is None:
+        canvas = pygame.Surface((GRID_SIZE, TILE_HEIGHT), pygame.SRCALPHA)
+        cube._render_tile(canvas, 0, 0, variant)
+        # Crop away the fully transparent margin (e.g. above a floor tile) so blits stay small.
+        bounds = canvas.get_bounding_rect()
+        tile = (canvas.subsurface(bounds).copy(), bounds.topleft)
+        _tile_atlas[key] = tile
+    return tile
+
+def clear_tile_atlas():
+    """Empties the tile atlas, e.g. after textures have been reloaded."""
+    _tile_atlas.clear()
+
 class Cube(ABC):
+    """
+    Base class of the map tiles. Cubes hold no per-cell state, so a single instance of each
+    type is shared by every cell and level (see CubeFactory.get_cube); per-cell data such as
+    wall adjacency lives in the Maze and is passed in as the tile variant when drawing.
+    """
+    tile_code = TILE_EMPTY # Overridden by each concrete cube type
+
     def __init__(self):
         self.top_texture = None
         self.front_texture = None
@@ -85,12 +152,19 @@ class Cube(ABC):
 
 
     @abstractmethod
-    def draw(self, surface, x, y):
+    def _render_tile(self, surface, x, y, variant):
+        """Draws the cube from scratch. Only used to fill the tile atlas."""
         pass
 
+    def draw(self, surface, x, y, variant=0):
+        tile_surface, (offset_x, offset_y) = get_tile(self, variant)
+        surface.blit(tile_surface, (x + offset_x, y + offset_y))
+
 class FloorCube(Cube):
+    tile_code = TILE_FLOOR
+
     def _load_textures(self):
-        self.top_texture = floor_texture_base
+        self.top_texture = get_base_texture('floor')
         # No front_texture for FloorCube
 
     def _calculate_natural_border_colors(self):
@@ -103,7 +177,7 @@ class FloorCube(Cube):
             self.seam_line_color = derived_color
 
 
-    def draw(self, surface, x, y):
+    def _render_tile(self, surface, x, y, variant):
         floor_y_position = y + int(GRID_SIZE * 0.4)
         scaled_floor_texture_height = int(GRID_SIZE * 0.8)
         # Texture blitting (ensure self.top_texture is valid)
@@ -125,7 +199,8 @@ class _StandardDecorativeCube(Cube):
     # _load_textures is implemented by subclasses (RockCube, WoodCube)
     # _calculate_natural_border_colors uses the default Cube implementation which should work well.
 
-    def draw(self, surface, x, y):
+    def _render_tile(self, surface, x, y, variant):
+        # Rocks and wood look the same everywhere, so variant is unused; every border is drawn.
         top_face_height = int(GRID_SIZE * 0.8)
         front_face_height = int(GRID_SIZE * 0.4)
 
@@ -159,23 +234,25 @@ class _StandardDecorativeCube(Cube):
 
 
 class RockCube(_StandardDecorativeCube):
+    tile_code = TILE_ROCK
+
     def _load_textures(self):
-        self.top_texture = rock_texture_base
-        self.front_texture = rock_texture_base
+        self.top_texture = get_base_texture('rock')
+        self.front_texture = self.top_texture
 
 class WoodCube(_StandardDecorativeCube):
+    tile_code = TILE_WOOD
+
     def _load_textures(self):
-        self.top_texture = wood_texture_base
-        self.front_texture = wood_texture_base
+        self.top_texture = get_base_texture('wood')
+        self.front_texture = self.top_texture
 
 class WallCube(Cube):
-    def __init__(self):
-        super().__init__() 
-        self.adjacent_status = [-1, -1, -1, -1] 
+    tile_code = TILE_WALL
 
     def _load_textures(self):
-        self.top_texture = wall_texture_base
-        self.front_texture = wall_texture_base 
+        self.top_texture = get_base_texture('wall')
+        self.front_texture = self.top_texture
 
     def _calculate_natural_border_colors(self):
         if self.top_texture: 
@@ -189,7 +266,9 @@ class WallCube(Cube):
         self.seam_line_color = self.wall_border_color
 
 
-    def draw(self, surface, x, y):
+    def _render_tile(self, surface, x, y, variant):
+        # variant holds the WALL_* bits of the neighbouring walls; borders are only drawn
+        # on the sides facing something else, so joined walls read as one block.
         top_face_h = int(GRID_SIZE * 0.8)
         front_face_h = int(GRID_SIZE * 0.4)
         width = GRID_SIZE
@@ -210,18 +289,18 @@ class WallCube(Cube):
 
         border_color = self.wall_border_color 
 
-        if self.adjacent_status[1] == -1: 
+        if not variant & WALL_UP: 
             pygame.draw.line(surface, border_color, (x, y), (x + width - 1, y))
-        if self.adjacent_status[0] == -1: 
+        if not variant & WALL_LEFT: 
             pygame.draw.line(surface, border_color, (x, y), (x, y + top_face_h - 1))
-        if self.adjacent_status[2] == -1: 
+        if not variant & WALL_RIGHT: 
             pygame.draw.line(surface, border_color, (x + width - 1, y), (x + width - 1, y + top_face_h - 1))
         
         pygame.draw.line(surface, border_color, (x, y + top_face_h - 1), (x + width - 1, y + top_face_h - 1)) # Seam
 
-        if self.adjacent_status[0] == -1: 
+        if not variant & WALL_LEFT: 
             pygame.draw.line(surface, border_color, (x, front_face_abs_y), (x, front_face_abs_y + front_face_h - 1))
-        if self.adjacent_status[2] == -1: 
+        if not variant & WALL_RIGHT: 
             pygame.draw.line(surface, border_color, (x + width - 1, front_face_abs_y), (x + width - 1, front_face_abs_y + front_face_h - 1))
-        if self.adjacent_status[3] == -1: 
+        if not variant & WALL_DOWN: 
             pygame.draw.line(surface, border_color, (x, front_face_abs_y + front_face_h - 1), (x + width - 1, front_face_abs_y + front_face_h - 1))
\ No newline at end of file
@@ -0,0 +1,198 @@
+# environment.py
+import os
+import sys
+import multiprocessing
+import pygame
+from level_controller import LevelController, LEVEL_CONFIG
+from npc import NPC_CONFIGS
+from npc_batch import FSM_STATES, FACING_DIRECTIONS, np
+from simulation import Simulation, DEFAULT_MAX_TICKS
+
+# Action index -> key tapped for it; 0 does nothing. Keys act as in Player.handle_key_down:
+# an arrow turns the player to face that way, or steps forward if it already faces it.
+ACTIONS = (None, pygame.K_UP, pygame.K_DOWN, pygame.K_LEFT, pygame.K_RIGHT, pygame.K_SPACE)
+TICKS_PER_ACTION = 4 # Simulation ticks run per step(); a grid move takes 12, an attack 48
+NPC_TYPES = tuple(NPC_CONFIGS) # Type codes in observations
+KILL_REWARD = 1.0
+DAMAGE_REWARD = -1.0 # Per point of health lost
+WIN_REWARD = 5.0
+
+# Columns of the 'npcs' observation, one row per NPC slot (rows past the live NPCs are all zero)
+NPC_COLUMNS = ('alive', 'grid_x', 'grid_y', 'fsm_state', 'npc_type', 'health')
+# Entries of the 'player' observation
+PLAYER_COLUMNS = ('grid_x', 'grid_y', 'facing_direction', 'health')
+
+class LevelEnv:
+    """
+    A reset/step environment over one level, for training and evaluating bot players.
+    Runs a headless Simulation without sprites or sounds, so resets are cheap.
+
+    Observations are dicts of NumPy arrays:
+      'tiles'  (height, width) uint8 cube.TILE_* codes of the maze
+      'npcs'   (max NPCs, len(NPC_COLUMNS)) int16, FSM states as FSM_STATES indices, types as NPC_TYPES indices
+      'player' (len(PLAYER_COLUMNS),) int16, facing as a FACING_DIRECTIONS index
+    Actions are indices into ACTIONS. step() returns (observation, reward, terminated, truncated, info).
+    reset(seed) seeds the level's RNG, so a seed and the same actions replay a run exactly.
+    """
+    def __init__(self, level_number, level_controller=None, ticks_per_action=TICKS_PER_ACTION,
+                 max_ticks=DEFAULT_MAX_TICKS):
+        if np is None:
+            raise RuntimeError("LevelEnv needs NumPy (pip install numpy).")
+        self.level_controller = level_controller or LevelController()
+        if level_number not in self.level_controller.levels:
+            raise ValueError(f"Level {level_number} does not exist.")
+        self.level_number = level_number
+        self.ticks_per_action = ticks_per_action
+        self.max_ticks = max_ticks
+        self.max_npcs = LEVEL_CONFIG.get(level_number, {}).get('npc_count', 0)
+        self.sim = None
+        self._tiles = None
+        self._alive = 0
+
+    def reset(self, seed=None):
+        """Starts a new run of the level. Returns (observation, info)."""
+        self.sim = Simulation.from_level(self.level_number, self.level_controller, seed=seed)
+        maze = self.sim.maze
+        self._tiles = np.frombuffer(maze.tile_codes, dtype=np.uint8).reshape(maze.height, maze.max_row_length).copy()
+        self._tiles.setflags(write=False)
+        self._alive = self._count_alive()
+        return self._observe(), self._info()
+
+    def step(self, action):
+        """Taps the action's key and advances ticks_per_action ticks. Returns (observation, reward, terminated, truncated, info)."""
+        sim = self.sim
+        key = ACTIONS[action]
+        if key is not None:
+            sim.press(key)
+            sim.release(key) # Tapped, so a held key never starts a run
+        health = sim.player.health
+        for _ in range(self.ticks_per_action):
+            sim.step()
+            if sim.done:
+                break
+
+        alive = self._count_alive()
+        reward = (self._alive - alive) * KILL_REWARD + (health - sim.player.health) * DAMAGE_REWARD
+        if sim.won:
+            reward += WIN_REWARD
+        self._alive = alive
+        truncated = not sim.done and sim.ticks >= self.max_ticks
+        return self._observe(), reward, sim.done, truncated, self._info()
+
+    def _count_alive(self):
+        return sum(1 for npc in self.sim.maze.npcs if not npc.is_dead)
+
+    def _observe(self):
+        player = self.sim.player
+        npcs = np.zeros((self.max_npcs, len(NPC_COLUMNS)), dtype=np.int16)
+        # Corpses are left out; their rows would only repeat the kill
+        live_npcs = [npc for npc in self.sim.maze.npcs if not npc.is_dead][:self.max_npcs]
+        for row, npc in enumerate(live_npcs):
+            npcs[row] = (1, npc.grid_x, npc.grid_y, FSM_STATES.index(npc.fsm_state),
+                         NPC_TYPES.index(npc.npc_type), npc.health)
+        player_obs = np.array((player.grid_x, player.grid_y, FACING_DIRECTIONS.index(player.facing_direction),
+                               player.health), dtype=np.int16)
+        return {'tiles': self._tiles, 'npcs': npcs, 'player': player_obs}
+
+    def _info(self):
+        sim = self.sim
+        return {'ticks': sim.ticks, 'time': sim.time, 'won': sim.won, 'lost': sim.lost, 'npcs_alive': self._alive}
+
+# --- Vectorised Environments ---
+
+def _stack(observations):
+    return {name: np.stack([obs[name] for obs in observations]) for name in observations[0]}
+
+class VectorLevelEnv:
+    """
+    Steps num_envs independent LevelEnvs of a level with one call, in this process or, with
+    workers > 0, spread over that many worker processes. Observations are stacked along a new first
+    axis. An environment that finishes is reset straight away; its last observation is kept in its
+    info as 'final_observation'.
+    """
+    def __init__(self, level_number, num_envs, workers=0, map_file='map.txt', **env_kwargs):
+        if np is None:
+            raise RuntimeError("VectorLevelEnv needs NumPy (pip install numpy).")
+        self.num_envs = num_envs
+        self._pipes = []
+        self._processes = []
+        if workers <= 0:
+            level_controller = LevelController(map_file)
+            self._envs = [LevelEnv(level_number, level_controller, **env_kwargs) for _ in range(num_envs)]
+            return
+
+        # Worker w hosts envs w, w + workers, w + 2 * workers, ...
+        self._envs = None
+        workers = min(workers, num_envs)
+        context = multiprocessing.get_context()
+        for worker in range(workers):
+            parent_end, child_end = context.Pipe()
+            env_count = len(range(worker, num_envs, workers))
+            process = context.Process(target=_env_worker, daemon=True,
+                                      args=(child_end, level_number, env_count, map_file, env_kwargs))
+            process.start()
+            child_end.close()
+            self._pipes.append(parent_end)
+            self._processes.append(process)
+
+    def _split(self, values):
+        workers = len(self._pipes)
+        return [values[worker::workers] for worker in range(workers)]
+
+    def _merge(self, per_worker):
+        workers = len(self._pipes)
+        merged = [None] * self.num_envs
+        for worker, results in enumerate(per_worker):
+            merged[worker::workers] = results
+        return merged
+
+    def _call(self, command, per_env_args):
+        """Runs command on every env with its argument and returns the results in env order."""
+        if self._envs is not None:
+            return [_run_env_command(env, command, arg) for env, arg in zip(self._envs, per_env_args)]
+        for pipe, args in zip(self._pipes, self._split(per_env_args)):
+            pipe.send((command, args))
+        return self._merge([pipe.recv() for pipe in self._pipes])
+
+    def reset(self, seed=None):
+        """Resets every env; with a seed, env i is seeded with seed + i. Returns (observations, infos)."""
+        seeds = [None if seed is None else seed + i for i in range(self.num_envs)]
+        results = self._call('reset', seeds)
+        return _stack([obs for obs, _ in results]), [info for _, info in results]
+
+    def step(self, actions):
+        """Steps env i with actions[i]. Returns stacked (observations, rewards, terminated, truncated, infos)."""
+        results = self._call('step', list(actions))
+        observations, rewards, terminated, truncated, infos = zip(*results)
+        return (_stack(observations), np.array(rewards, dtype=np.float32), np.array(terminated),
+                np.array(truncated), list(infos))
+
+    def close(self):
+        for pipe in self._pipes:
+            pipe.send(('close', None))
+            pipe.close()
+        for process in self._processes:
+            process.join()
+        self._pipes = []
+        self._processes = []
+
+def _run_env_command(env, command, arg):
+    if command == 'reset':
+        return env.reset(arg)
+    obs, reward, terminated, truncated, info = env.step(arg)
+    if terminated or truncated:
+        info['final_observation'] = obs
+        obs, _ = env.reset()
+    return obs, reward, terminated, truncated, info
+
+def _env_worker(pipe, level_number, env_count, map_file, env_kwargs):
+    """Worker process loop: hosts env_count LevelEnvs and runs the commands sent over pipe."""
+    sys.stdout = open(os.devnull, 'w') # The game reports hits and deaths on the console
+    level_controller = LevelController(map_file)
+    envs = [LevelEnv(level_number, level_controller, **env_kwargs) for _ in range(env_count)]
+    while True:
+        command, args = pipe.recv()
+        if command == 'close':
+            break
+        pipe.send([_run_env_command(env, command, arg) for env, arg in zip(envs, args)])
+    pipe.close()
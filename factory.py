@@ -12,6 +12,23 @@ class CubeFactory:
         'P': FloorCube
     }
 
+    # One shared instance per cube class, see get_cube
+    _instances = {}
+
+    @staticmethod
+    def get_cube(cube_char):
+        """
+        Returns the shared cube instance for a character symbol, creating it on first use.
+        Cubes are stateless, so maps reuse these instead of building one object per cell.
+        Defaults to FloorCube if the character is not recognized.
+        """
+        cube_class = CubeFactory._cube_map.get(cube_char, FloorCube)
+        cube = CubeFactory._instances.get(cube_class)
+        if cube is None:
+            cube = cube_class()
+            CubeFactory._instances[cube_class] = cube
+        return cube
+
     @staticmethod
     def create_cube(cube_char):
         """
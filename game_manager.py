@@ -1,18 +1,38 @@
 # game_manager.py
 import pygame
+import os
 import sys
+import time
+import player
+import npc
 from menu import Menu
 from level_page import LevelPage
 from level_controller import LevelController
-from player import Player, DEATH_SEQUENCE_DURATION
-from npc import NPC
+from simulation import Simulation, SIMULATION_STEP
 from cube import GRID_SIZE
+from asset_loader import AssetLoader
+from text_cache import FONT_PATH, get_font, render_text
+from hud import ImageWidget, HealthBarWidget, PauseOverlayWidget
+from headless import init_headless
 
 # --- Constants ---
 SCREEN_WIDTH = 1000
 SCREEN_HEIGHT = 700
 FLOOR_BACKGROUND_COLOR = (46, 80, 93)
 STAGGER_HEIGHT_PER_ROW = int(GRID_SIZE * 0.8)
+HEALTH_BAR_RECT = pygame.Rect(10, 10, 204, 24)
+DIRTY_RECT_MARGIN = 2 # Covers the sub-pixel rounding of sprites blitted at float positions
+MAX_FRAME_TIME = 0.25 # Longer frames (e.g. a window drag) are clamped so the game doesn't try to catch up all at once
+MAX_RENDER_FPS = 144
+SOUND_EFFECT_FILES = {'win': './assets/win.mp3', 'lose': './assets/lose.mp3', 'click': './assets/click.mp3'}
+
+def changed_draw_rects(previous_states, current_states):
+    """
+    Given two sets of (rect tuple, image, flipped) draw states, returns the screen rects
+    that must be presented: the old and new area of everything that moved or changed frame.
+    """
+    return [pygame.Rect(state[0]).inflate(DIRTY_RECT_MARGIN * 2, DIRTY_RECT_MARGIN * 2)
+            for state in previous_states ^ current_states]
 
 # --- Base State Class ---
 class BaseState:
@@ -20,23 +40,44 @@ class BaseState:
     def __init__(self):
         self.next_state = None
         self.done = False
+        self.render_alpha = 1.0
 
     def handle_events(self, events):
         raise NotImplementedError
 
     def update(self, dt):
+        """Advances the state by one fixed simulation step of dt seconds."""
         raise NotImplementedError
 
+    def set_render_alpha(self, alpha):
+        """Sets how far (0.0 to 1.0) rendering is between the last two updates, for states that interpolate."""
+        self.render_alpha = alpha
+
     def draw(self, screen):
         raise NotImplementedError
 
+    def get_dirty_rects(self):
+        """
+        Used by the dirty-rect display mode. Called once per frame after update() and returns the
+        screen rects that changed since the previous frame: None means redraw and present everything,
+        an empty list means the frame is idle and nothing needs to be presented.
+        """
+        return None
+
 # --- Menu State ---
 class MenuState(BaseState):
-    def __init__(self, screen, click_sound):
+    def __init__(self, screen, sounds, asset_loader=None):
         super().__init__()
         self.screen = screen
-        self.menu = Menu(screen)
-        self.click_sound = click_sound
+        self.menu = Menu(screen, asset_loader)
+        self.sounds = sounds # Shared dict, filled in by the background asset loader
+        self._last_draw_states = set()
+        self._last_hovered_buttons = set()
+        self._last_loading_state = None
+
+    @property
+    def click_sound(self):
+        return self.sounds.get('click')
 
     def handle_events(self, events):
         menu_choice = self.menu.run(events)
@@ -54,14 +95,35 @@ class MenuState(BaseState):
     def draw(self, screen):
         self.menu.draw()
 
+    def get_dirty_rects(self):
+        loading_state = (self.menu.showcase_ready, self.menu.asset_loader.progress if self.menu.asset_loader else 1.0)
+        last_loading_state, self._last_loading_state = self._last_loading_state, loading_state
+        if last_loading_state is not None and loading_state[0] != last_loading_state[0]:
+            return None # The showcase replaces the loading indicator
+
+        draw_states = set(self.menu.get_showcase_draw_states())
+        hovered_buttons = self.menu.get_hovered_buttons()
+        rects = changed_draw_rects(self._last_draw_states, draw_states)
+        rects += [pygame.Rect(rect) for rect in hovered_buttons ^ self._last_hovered_buttons]
+        self._last_draw_states, self._last_hovered_buttons = draw_states, hovered_buttons
+        if loading_state != last_loading_state and not self.menu.showcase_ready:
+            rects.append(self.menu.get_loading_rect())
+        return rects
+
 # --- Level Select State ---
 class LevelSelectState(BaseState):
-    def __init__(self, screen, level_controller, click_sound):
+    def __init__(self, screen, level_controller, sounds):
         super().__init__()
         self.screen = screen
         self.level_controller = level_controller
         self.level_page = LevelPage(screen, level_controller)
-        self.click_sound = click_sound
+        self.sounds = sounds
+        self._last_hovered_level = None
+        self._last_unlocked_count = None
+
+    @property
+    def click_sound(self):
+        return self.sounds.get('click')
 
     def handle_events(self, events):
         level_choice = self.level_page.run(events)
@@ -82,22 +144,39 @@ class LevelSelectState(BaseState):
     def draw(self, screen):
         self.level_page.draw()
 
+    def get_dirty_rects(self):
+        hovered_level = self.level_page.get_hovered_level()
+        unlocked_count = self.level_controller.get_unlocked_level_count()
+        if unlocked_count != self._last_unlocked_count:
+            rects = None
+        else:
+            rects = []
+            if hovered_level != self._last_hovered_level:
+                rects = [self.level_page.level_rects[level_num] for level_num in (hovered_level, self._last_hovered_level) if level_num is not None]
+        self._last_hovered_level, self._last_unlocked_count = hovered_level, unlocked_count
+        return rects
+
 # --- Gameplay State ---
 class GameplayState(BaseState):
-    def __init__(self, screen, level_controller, level_number, sounds):
+    def __init__(self, screen, level_controller, level_number, sounds, seed=None, record=False):
         super().__init__()
         self.screen = screen
         self.level_controller = level_controller
         self.win_music, self.lose_music, self.click_sound = sounds['win'], sounds['lose'], sounds['click']
 
-        self.maze = level_controller.get_level(level_number)
+        self.maze = level_controller.get_level(level_number, seed=seed)
         if not self.maze:
             print(f"Error: Could not load level {level_number}.")
             self.next_state = 'LEVEL_SELECT'
             self.done = True
             return
             
-        self.player = Player(1, 1, self.maze)
+        # The game logic itself; this state adds input, camera, sound and drawing on top
+        self.simulation = Simulation(self.maze)
+        if record:
+            self.simulation.start_recording()
+        self.player = self.simulation.player
+        self.maze.camera.center_on(*self.player.get_focus_point())
         self.clock = pygame.time.Clock()
 
         # --- UI and Pause Setup ---
@@ -112,25 +191,37 @@ class GameplayState(BaseState):
         self.lose_sound_played = False
         self.active_level_number = level_number
 
+        # --- Dirty-rect tracking ---
+        self._last_draw_states = set()
+        self._last_ui_state = None
+
     def setup_ui_elements(self):
         self.stop_icon = pygame.transform.scale(pygame.image.load('./assets/stop2.png').convert_alpha(), (40, 40))
         self.stop_icon_rect = self.stop_icon.get_rect(topright=(SCREEN_WIDTH - 70, 18))
-        font = pygame.font.Font("./assets/font.ttf", 72)
-        self.game_over_text = font.render("GAME OVER", True, (255, 255, 255))
-        self.win_text = font.render("YOU WIN!", True, (255, 255, 255))
+        font = get_font(FONT_PATH, 72)
+        self.game_over_text = render_text(font, "GAME OVER", (255, 255, 255))
+        self.win_text = render_text(font, "YOU WIN!", (255, 255, 255))
         self.game_over_rect = self.game_over_text.get_rect(center=(SCREEN_WIDTH/2, SCREEN_HEIGHT/2))
         self.win_rect = self.win_text.get_rect(center=(SCREEN_WIDTH/2, SCREEN_HEIGHT/2))
 
+        # Retained-mode HUD widgets, each re-rendered only when what it shows changes
+        self.health_bar = HealthBarWidget(self.player, HEALTH_BAR_RECT)
+        self.stop_icon_widget = ImageWidget(self.stop_icon, self.stop_icon_rect)
+        self.game_over_banner = ImageWidget(self.game_over_text, self.game_over_rect)
+        self.win_banner = ImageWidget(self.win_text, self.win_rect)
+
     def setup_pause_menu(self):
-        font = pygame.font.Font("./assets/font.ttf", 72)
+        font = get_font(FONT_PATH, 72)
         button_color = (60, 95, 110)
         text_color = (255, 255, 255)
-        self.resume_text = font.render("Keep Playing", True, text_color)
-        self.menu_text = font.render("Back to Menu", True, text_color)
+        self.resume_text = render_text(font, "Keep Playing", text_color)
+        self.menu_text = render_text(font, "Back to Menu", text_color)
         self.resume_rect = pygame.Rect(0, 0, 490, 100)
         self.menu_rect = pygame.Rect(0, 0, 490, 100)
         self.resume_rect.center = (SCREEN_WIDTH / 2, SCREEN_HEIGHT / 2 - 80)
         self.menu_rect.center = (SCREEN_WIDTH / 2, SCREEN_HEIGHT / 2 + 80)
+        self.pause_overlay = PauseOverlayWidget((SCREEN_WIDTH, SCREEN_HEIGHT),
+                                                [(self.resume_rect, self.resume_text), (self.menu_rect, self.menu_text)])
 
     def handle_events(self, events):
         for event in events:
@@ -147,9 +238,9 @@ class GameplayState(BaseState):
                          self.done = True
                          self.next_state = 'LEVEL_SELECT'
                     else:
-                        self.player.handle_key_down(event.key, self.maze.npcs)
+                        self.simulation.press(event.key)
                 elif event.type == pygame.KEYUP:
-                    self.player.handle_key_up(event.key)
+                    self.simulation.release(event.key)
 
     def handle_mouse_clicks(self, pos):
         if not self.paused and self.stop_icon_rect.collidepoint(pos):
@@ -159,101 +250,147 @@ class GameplayState(BaseState):
             if self.resume_rect.collidepoint(pos):
                 if self.click_sound: self.click_sound.play()
                 self.paused = False
+                self.pause_overlay.reset()
             if self.menu_rect.collidepoint(pos):
                 if self.click_sound: self.click_sound.play()
                 self.done = True
                 self.next_state = 'MENU'
 
     def update(self, dt):
+        # Keep the positions before this step, so draw() can interpolate towards the new ones
+        self.player.save_render_state()
+        self.maze.save_render_state()
         if self.paused:
             return
 
-        self.player.update(dt, self.maze.npcs)
-        for npc in self.maze.npcs:
-            other_npcs = [other for other in self.maze.npcs if other != npc]
-            npc.update(dt, self.player, other_npcs)
-
-        # Remove dead NPCs
-        self.maze.npcs = [npc for npc in self.maze.npcs if not (npc.is_dead and npc.death_timer > npc.config["death_duration"])]
-
-        # Check for game over or win conditions
-        if not self.game_over and self.player.is_dead and self.player.death_timer > DEATH_SEQUENCE_DURATION:
-            self.game_over = True
-        if not self.win and not self.maze.npcs:
-            self.win = True
+        self.simulation.step(dt)
+        self.maze.update_camera(dt, self.player)
+        self.game_over, self.win = self.simulation.lost, self.simulation.won
 
     def draw(self, screen):
+        if self.paused and self.pause_overlay.is_frozen():
+            # The scene cannot change while paused, so the captured paused frame is all there is to draw
+            self.pause_overlay.draw(screen)
+            return
+
         screen.fill(FLOOR_BACKGROUND_COLOR)
-        self.maze.draw(screen, self.player, self.maze.npcs)
+        self.maze.draw(screen, self.render_alpha)
         self.draw_ui(screen)
-        screen.blit(self.stop_icon, self.stop_icon_rect)
+        self.stop_icon_widget.draw(screen)
 
         if self.game_over:
             if self.lose_music and not self.lose_sound_played:
                 self.lose_music.play()
                 self.lose_sound_played = True
-            screen.blit(self.game_over_text, self.game_over_rect)
+            self.game_over_banner.draw(screen)
         elif self.win:
             if self.win_music and not self.win_sound_played:
                 self.win_music.play()
                 self.win_sound_played = True
-            screen.blit(self.win_text, self.win_rect)
+            self.win_banner.draw(screen)
 
         if self.paused:
             self.draw_pause_overlay(screen)
             
+    def get_dirty_rects(self):
+        entities = self.maze.npcs + [self.player]
+        offset_x, offset_y = self.maze.camera.get_offset(self.render_alpha)
+        draw_states = {state for state in (entity.get_draw_state(offset_x, offset_y, self.render_alpha) for entity in entities) if state}
+        ui_state = (self.paused, self.game_over, self.win, offset_x, offset_y, self.player.health)
+        last_ui_state, self._last_ui_state = self._last_ui_state, ui_state
+        rects = changed_draw_rects(self._last_draw_states, draw_states)
+        self._last_draw_states = draw_states
+
+        if last_ui_state is None or ui_state[:5] != last_ui_state[:5]:
+            return None # Pausing, a win/lose banner or a camera scroll changes the whole screen
+        if ui_state[5] != last_ui_state[5]:
+            rects.append(HEALTH_BAR_RECT)
+        return rects
+
     def draw_ui(self, screen):
-        health_bar_bg = pygame.Rect(10, 10, 204, 24)
-        pygame.draw.rect(screen, (50, 50, 50), health_bar_bg)
-        health_ratio = self.player.health / self.player.max_health
-        health_bar_fg = pygame.Rect(12, 12, 200 * health_ratio, 20)
-        pygame.draw.rect(screen, (200, 20, 20), health_bar_fg)
-        pygame.draw.rect(screen, (255, 255, 255), health_bar_bg, 2)
+        self.health_bar.draw(screen)
 
     def draw_pause_overlay(self, screen):
-        overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
-        overlay.fill((0, 0, 0, 180))
-        screen.blit(overlay, (0, 0))
-        pygame.draw.rect(screen, (60, 95, 110), self.resume_rect, border_radius=10)
-        pygame.draw.rect(screen, (60, 95, 110), self.menu_rect, border_radius=10)
-        screen.blit(self.resume_text, self.resume_text.get_rect(center=self.resume_rect.center))
-        screen.blit(self.menu_text, self.menu_text.get_rect(center=self.menu_rect.center))
+        self.pause_overlay.draw(screen)
 
 # --- Game Manager ---
 class GameManager:
-    def __init__(self):
-        self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-        pygame.display.set_caption("THE DUNGEON WARRIOR")
+    def __init__(self, dirty_rects=False, headless=False, record_dir=None):
+        # In dirty-rect mode only the rects reported by the current state are presented,
+        # and idle frames are neither drawn nor presented.
+        self.dirty_rects = dirty_rects
+        self.full_redraw = True
+        # Headless mode renders into an offscreen surface on the SDL dummy drivers (see headless.py)
+        self.headless = headless
+        if headless:
+            self.screen = init_headless((SCREEN_WIDTH, SCREEN_HEIGHT))
+        else:
+            self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+            pygame.display.set_caption("THE DUNGEON WARRIOR")
         self.clock = pygame.time.Clock()
+        # When set, every level played is recorded into this directory (see replay.py)
+        self.record_dir = record_dir
         
         self.load_assets()
         self.level_controller = LevelController()
 
         self.states = {
-            'MENU': MenuState(self.screen, self.click_sound),
-            'LEVEL_SELECT': LevelSelectState(self.screen, self.level_controller, self.click_sound),
+            'MENU': MenuState(self.screen, self.sounds, self.asset_loader),
+            'LEVEL_SELECT': LevelSelectState(self.screen, self.level_controller, self.sounds),
             'GAMEPLAY': None # This will be created on the fly
         }
         self.current_state = self.states['MENU']
 
     def load_assets(self):
-        self.win_music, self.lose_music, self.click_sound = None, None, None
+        """
+        Loads what the menu needs right away (music stream, icons) and queues sound effects
+        and gameplay sprites on a background loader, so the first frame appears quickly.
+        """
+        self.sounds = {'win': None, 'lose': None, 'click': None}
         self.music_on = True
         try:
             pygame.mixer.music.load('./assets/music.mp3')
             pygame.mixer.music.set_volume(0.5)
-            self.win_music = pygame.mixer.Sound('./assets/win.mp3')
-            self.lose_music = pygame.mixer.Sound('./assets/lose.mp3')
-            self.click_sound = pygame.mixer.Sound('./assets/click.mp3')
         except pygame.error as e:
-            print(f"Warning: Could not load one or more sounds: {e}")
+            print(f"Warning: Could not load background music: {e}")
             self.music_on = False
             
         self.music_on_img = pygame.transform.scale(pygame.image.load('./assets/music.png').convert_alpha(), (50, 50))
         self.music_off_img = pygame.transform.scale(pygame.image.load('./assets/music.png').convert_alpha(), (50, 50))
         self.music_icon_rect = self.music_on_img.get_rect(topright=(SCREEN_WIDTH - 15, 15))
 
+        self.asset_loader = AssetLoader()
+        for name in SOUND_EFFECT_FILES:
+            self.asset_loader.add_task('sound:' + name, lambda name=name: self._load_sound_effect(name))
+        self.asset_loader.add_task('player_sounds', player.load_sounds)
+        self.asset_loader.add_task('npc_sounds', npc.load_sounds)
+        self.asset_loader.add_task('player_sprites', player.preload_sprites)
+        self.asset_loader.add_task('npc_sprites', npc.preload_sprites)
+        self.asset_loader.start()
+
+    def _load_sound_effect(self, name):
+        try:
+            self.sounds[name] = pygame.mixer.Sound(SOUND_EFFECT_FILES[name])
+        except pygame.error as e:
+            print(f"Warning: Could not load sound '{SOUND_EFFECT_FILES[name]}': {e}")
+        return self.sounds[name]
+
+    def save_recording(self):
+        """Saves the recording of the level being played, if there is one."""
+        simulation = getattr(self.current_state, 'simulation', None) # Only GameplayStates with a loaded level have one
+        recording = simulation and simulation.recording
+        if not recording or not recording.ticks:
+            return
+        path = os.path.join(self.record_dir, f"level{recording.level_number}_{time.strftime('%Y%m%d_%H%M%S')}.rec")
+        try:
+            os.makedirs(self.record_dir, exist_ok=True)
+            recording.save(path)
+            print(f"Recording saved to {path}")
+        except OSError as e:
+            print(f"Warning: Could not save recording '{path}': {e}")
+
     def transition_state(self, event_info=None):
+        self.save_recording()
         next_state_name = self.current_state.next_state
         if next_state_name == 'EXIT':
             self.level_controller._save_progress()
@@ -269,23 +406,30 @@ class GameManager:
 
         # Create a new gameplay state instance when needed
         if next_state_name == 'GAMEPLAY':
+            # Only blocks if the player picked a level before background loading finished
+            self.asset_loader.wait()
             level_num = event_info.get('level_number', 1)
-            sounds = {'win': self.win_music, 'lose': self.lose_music, 'click': self.click_sound}
-            self.states['GAMEPLAY'] = GameplayState(self.screen, self.level_controller, level_num, sounds)
+            self.states['GAMEPLAY'] = GameplayState(self.screen, self.level_controller, level_num, self.sounds,
+                                                    record=self.record_dir is not None)
         
         self.current_state = self.states[next_state_name]
+        self.full_redraw = True
 
     def run(self):
         if self.music_on:
             pygame.mixer.music.play(-1)
 
+        # Fixed-timestep loop: the game advances in SIMULATION_STEP updates regardless of the
+        # render rate, and each frame is drawn between the last two updates (see set_render_alpha).
+        accumulator = 0.0
         while True:
-            dt = self.clock.tick(60) / 1000.0
+            accumulator += min(self.clock.tick(MAX_RENDER_FPS) / 1000.0, MAX_FRAME_TIME)
             
             # --- Event Handling ---
             events = pygame.event.get()
             for event in events:
                 if event.type == pygame.QUIT:
+                    self.save_recording()
                     self.level_controller._save_progress()
                     pygame.quit()
                     sys.exit()
@@ -294,18 +438,35 @@ class GameManager:
                         self.music_on = not self.music_on
                         if self.music_on: pygame.mixer.music.unpause()
                         else: pygame.mixer.music.pause()
+                        self.full_redraw = True
             
             # --- State Machine Logic ---
             event_info = self.current_state.handle_events(events)
-            self.current_state.update(dt)
-            
-            self.screen.fill(FLOOR_BACKGROUND_COLOR)
-            self.current_state.draw(self.screen)
-
-            # Draw global UI elements (like music icon)
-            self.screen.blit(self.music_on_img if self.music_on else self.music_off_img, self.music_icon_rect)
-            
-            pygame.display.flip()
+            while accumulator >= SIMULATION_STEP and not self.current_state.done:
+                self.current_state.update(SIMULATION_STEP)
+                accumulator -= SIMULATION_STEP
+            self.current_state.set_render_alpha(min(accumulator / SIMULATION_STEP, 1.0))
+
+            # States track what they last reported, so ask every frame even when redrawing fully
+            dirty_rects = self.current_state.get_dirty_rects() if self.dirty_rects else None
+            if self.full_redraw:
+                dirty_rects = None
+                self.full_redraw = False
+
+            if dirty_rects is None or dirty_rects:
+                self.screen.fill(FLOOR_BACKGROUND_COLOR)
+                self.current_state.draw(self.screen)
+
+                # Draw global UI elements (like music icon)
+                self.screen.blit(self.music_on_img if self.music_on else self.music_off_img, self.music_icon_rect)
+
+                if self.headless:
+                    pass # Nothing to present; the frame stays in the offscreen surface
+                elif dirty_rects is None:
+                    pygame.display.flip()
+                else:
+                    pygame.display.update(dirty_rects)
 
             if self.current_state.done:
-                self.transition_state(event_info)
\ No newline at end of file
+                self.transition_state(event_info)
+                accumulator = 0.0 # The new state starts from its first step
\ No newline at end of file
@@ -0,0 +1,25 @@
+# headless.py
+import os
+import pygame
+
+def init_headless(surface_size):
+    """
+    Initialises pygame on the SDL dummy video and audio drivers, so the game runs on machines
+    without a display or sound card. A display or mixer pygame.init() has already opened is shut
+    down first, as SDL only picks its driver when a subsystem starts.
+    Returns an offscreen surface of surface_size to render frames into.
+    """
+    if pygame.display.get_init():
+        pygame.display.quit()
+    if pygame.mixer.get_init():
+        pygame.mixer.quit()
+    os.environ["SDL_VIDEODRIVER"] = "dummy"
+    os.environ["SDL_AUDIODRIVER"] = "dummy"
+    pygame.init()
+    try:
+        pygame.mixer.init()
+    except pygame.error as e:
+        print(f"Warning: Could not initialise the dummy audio driver: {e}")
+    # convert()/convert_alpha() need a video mode, even though nothing is ever shown
+    pygame.display.set_mode((1, 1))
+    return pygame.Surface(surface_size).convert()
@@ -0,0 +1,97 @@
+# hud.py
+import pygame
+
+class Widget:
+    """
+    A retained-mode HUD element. It keeps its rendered surface and only re-renders it when
+    the value returned by get_state() changes, so drawing is normally a single blit.
+    """
+    def __init__(self, rect):
+        self.rect = pygame.Rect(rect)
+        self._surface = None
+        self._state = None
+
+    def get_state(self):
+        """Returns the value the widget's look depends on. Static widgets keep the default."""
+        return None
+
+    def render(self, state):
+        """Builds the widget surface for the given state."""
+        raise NotImplementedError
+
+    def draw(self, screen):
+        state = self.get_state()
+        if self._surface is None or state != self._state:
+            self._surface = self.render(state)
+            self._state = state
+        screen.blit(self._surface, self.rect)
+
+class ImageWidget(Widget):
+    """A pre-rendered surface such as an icon or a text banner."""
+    def __init__(self, image, rect):
+        super().__init__(rect)
+        self._surface = image
+
+    def render(self, state):
+        return self._surface
+
+class HealthBarWidget(Widget):
+    """The player's health bar. Re-rendered only when the player's health changes."""
+    BACKGROUND_COLOR = (50, 50, 50)
+    FILL_COLOR = (200, 20, 20)
+    BORDER_COLOR = (255, 255, 255)
+
+    def __init__(self, player, rect):
+        super().__init__(rect)
+        self.player = player
+
+    def get_state(self):
+        return (self.player.health, self.player.max_health)
+
+    def render(self, state):
+        health, max_health = state
+        surface = pygame.Surface(self.rect.size)
+        local_rect = surface.get_rect()
+        pygame.draw.rect(surface, self.BACKGROUND_COLOR, local_rect)
+        health_bar_fg = pygame.Rect(2, 2, (local_rect.width - 4) * (health / max_health), local_rect.height - 4)
+        pygame.draw.rect(surface, self.FILL_COLOR, health_bar_fg)
+        pygame.draw.rect(surface, self.BORDER_COLOR, local_rect, 2)
+        return surface
+
+class PauseOverlayWidget(Widget):
+    """
+    The dimmed pause screen with its two buttons. While paused the scene underneath is frozen,
+    so the first draw composites the overlay onto the current frame and keeps a copy of the result;
+    later frames just blit that copy. Call reset() when the game resumes.
+    """
+    DIM_COLOR = (0, 0, 0, 180)
+    BUTTON_COLOR = (60, 95, 110)
+
+    def __init__(self, screen_size, buttons):
+        super().__init__(((0, 0), screen_size))
+        self.buttons = buttons # list of (rect, text surface)
+        self._overlay = None
+
+    def _build_overlay(self):
+        overlay = pygame.Surface(self.rect.size, pygame.SRCALPHA)
+        overlay.fill(self.DIM_COLOR)
+        for rect, text_surface in self.buttons:
+            pygame.draw.rect(overlay, self.BUTTON_COLOR, rect, border_radius=10)
+            overlay.blit(text_surface, text_surface.get_rect(center=rect.center))
+        return overlay
+
+    def is_frozen(self):
+        """True once the paused frame has been captured and the scene no longer needs drawing."""
+        return self._surface is not None
+
+    def reset(self):
+        self._surface = None
+
+    def draw(self, screen):
+        if self._surface is None:
+            if self._overlay is None:
+                self._overlay = self._build_overlay()
+            screen.blit(self._overlay, self.rect)
+            self._surface = screen.subsurface(self.rect).copy()
+            return
+        screen.blit(self._surface, self.rect)
@@ -1,14 +1,37 @@
 # level_controller.py
 import pygame
 import random
-from cube import FloorCube, WallCube, RockCube, WoodCube, GRID_SIZE
-from npc import NPC
+from collections import deque
+from operator import attrgetter
+from cube import (GRID_SIZE, TILE_FLAGS, TILE_EMPTY, TILE_FLOOR, TILE_WALL, TILE_WALKABLE, TILE_FLY_OVER, TILE_SPAWNABLE,
+                  WALL_LEFT, WALL_UP, WALL_RIGHT, WALL_DOWN)
+from factory import CubeFactory
+from npc import NPC, NPC_CONFIGS
+from npc_batch import NPCBatch, np
+from npc_scheduler import NPCScheduler
+from camera import Camera
+from chunk_cache import ChunkCache
 
 # Constants
 SCREEN_WIDTH = 1000
 SCREEN_HEIGHT = 700
 STAGGER_HEIGHT_PER_ROW = int(GRID_SIZE * 0.8)
+CUBE_FULL_VISUAL_HEIGHT = int(GRID_SIZE * 1.2)
 PLAYER_START_POS = (1, 1)
+_SCREEN_X_KEY = attrgetter('current_screen_x')
+_SCREEN_Y_KEY = attrgetter('current_screen_y') # Orders entities that share a row (sorted by x first, so ties go left to right)
+CHUNK_SIZE = 8 # Tiles per side of one cached background chunk
+CHUNK_CACHE_BUDGET = 64 * 1024 * 1024 # Default max bytes of rendered chunks kept per maze
+ENTITY_CULL_MARGIN_ROWS = 5 # Sprites are up to ~5 rows tall (the player is 312 px), so they reach past their row
+ENTITY_CULL_MARGIN_COLS = 2 # Sprites are up to 3 cells wide (the player is 240 px) and slide a cell while moving
+FLOW_STEPS = ((0, 0), (0, -1), (0, 1), (-1, 0), (1, 0)) # Flow field step codes: none, up, down, left, right
+FACING_STEPS = {"up": (0, -1), "down": (0, 1), "left": (-1, 0), "right": (1, 0)}
+FACING_INDEX = {facing: i for i, facing in enumerate(FACING_STEPS)} # Byte of each facing in a cell's sight ranges
+MAX_DETECTION_RANGE = max(config["detection_range"] for config in NPC_CONFIGS.values())
+# Flow fields only reach this many moves from the player. NPCs chase only what they see in a straight
+# line within MAX_DETECTION_RANGE; the margin covers the player moving on before they catch up.
+FLOW_FIELD_RADIUS = MAX_DETECTION_RANGE + 3
+VIEW_LAG_MARGIN = 2 # Cells the view can trail behind the player while the camera catches up
 
 # --- NEW: Level Difficulty Configuration ---
 # Defines the number of NPCs and the available types for each level.
@@ -28,24 +51,70 @@ LEVEL_CONFIG = {
 
 class Maze:
     """Represents a single level's map and NPCs."""
-    def __init__(self, grid, player_start_pos, level_number):
-        self.grid = grid
+    def __init__(self, grid, player_start_pos, level_number, chunk_cache_budget=CHUNK_CACHE_BUDGET, batch_npcs=False,
+                 sight_range_cache=None, load_assets=True, seed=None, npc_lod=True):
+        self.grid = [list(row) for row in grid] # Own row lists, so set_cube doesn't leak into other Mazes of the level
         self.height = len(grid)
         self.width = len(grid[0]) if self.height > 0 else 0
         self.npcs = []
+        self.npc_batch = None
         self.level_number = level_number
+        self.load_assets = load_assets # Whether NPCs load their sprites; False for headless simulations
+        # All of the level's randomness (spawns, NPC decisions) comes from this RNG, so a seed replays a session
+        self.seed = random.randrange(2 ** 64) if seed is None else seed
+        self.rng = random.Random(self.seed)
         
-        self.offset_x = (SCREEN_WIDTH - self.width * GRID_SIZE) // 2
-        cube_full_visual_height = int(GRID_SIZE * 1.2)
+        # Rows in map.txt are not guaranteed to be the same length, so size by the widest one.
+        self.max_row_length = max((len(row) for row in grid), default=0)
         height_of_staggered_rows = (self.height - 1) * STAGGER_HEIGHT_PER_ROW
-        rendered_maze_height = height_of_staggered_rows + cube_full_visual_height
-        self.offset_y = (SCREEN_HEIGHT - rendered_maze_height) // 2
+        rendered_maze_height = height_of_staggered_rows + CUBE_FULL_VISUAL_HEIGHT
+        # Maps that fit on screen stay centred; larger ones scroll with the player.
+        self.camera = Camera(SCREEN_WIDTH, SCREEN_HEIGHT, self.max_row_length * GRID_SIZE, rendered_maze_height)
 
-        self._spawn_npcs(player_start_pos)
+        # Baked static geometry, rendered lazily chunk by chunk as it scrolls into view (see _render_chunk).
+        self.chunk_cache = ChunkCache(self._render_chunk, chunk_cache_budget)
+
+        # Row-major tile codes (cube.TILE_*) and their property flags, one byte per cell.
+        # Index with y * max_row_length + x; cells past the end of a short row are TILE_EMPTY.
+        self.tile_codes = bytearray(self.height * self.max_row_length)
+        self.tile_flags = bytearray(len(self.tile_codes))
+        # Per-cell WALL_* bits of neighbouring walls, the tile variant walls are drawn with.
+        # Kept here rather than on the cubes, which are shared between cells and levels.
+        self.wall_masks = bytearray(len(self.tile_codes))
+        self._build_tile_codes()
+
+        # Line-of-sight index, see build_sight_ranges(). Built on first use and shared with later
+        # Mazes of the level through sight_range_cache (level number -> index), if one is passed in.
+        self._sight_range_cache = sight_range_cache
+        self._sight_ranges = sight_range_cache.get(level_number) if sight_range_cache is not None else None
+
+        # The entity standing on each cell (player or live NPC), kept up to date by the entities' moves
+        self.occupancy = [[None] * self.max_row_length for _ in range(self.height)]
+
+        # Entities bucketed by the row and column chunk of the cell they stand on ({chunk_x: [entity]}
+        # per row), kept up to date by place_entity/move_entity; dead NPCs leave their bucket once
+        # they are removed from the maze.
+        self._entity_buckets = [{} for _ in range(self.height)]
+        self._entity_bucket_of = {}
+        self._row_entities = [] # Reused by draw() for the entities of one row
+
+        # BFS flow fields around the player, keyed by the tile flags they may cross. Rebuilt lazily
+        # once the player has changed cell; each is (step codes, distances), see _build_flow_field.
+        self._flow_origin = None
+        self._flow_fields = {}
+
+        self._spawn_npcs(player_start_pos, batch_npcs)
+        # Unbatched NPCs are updated through a scheduler that lets idle ones far from the player sleep,
+        # and with npc_lod, simulates NPCs in less detail the further off screen they are
+        self.npc_scheduler = None if self.npc_batch else NPCScheduler(self, self.npcs, MAX_DETECTION_RANGE, lod=npc_lod)
         self._update_wall_adjacencies()
 
-    def _spawn_npcs(self, player_start_pos):
-        """Spawns NPCs based on the level's configuration."""
+    def _spawn_npcs(self, player_start_pos, batch_npcs=False):
+        """
+        Spawns NPCs based on the level's configuration. batch_npcs stores and updates them in an
+        NPCBatch (needs NumPy) instead. That advances every NPC every step, so by default even large
+        levels go through the NPCScheduler, which only spends time on the NPCs that are doing something.
+        """
         self.npcs = []
         if self.level_number not in LEVEL_CONFIG:
             print(f"Warning: No level config found for level {self.level_number}. No NPCs will spawn.")
@@ -56,64 +125,396 @@ class Maze:
         allowed_npc_types = config['types']
 
         possible_spawn_points = []
+        stride, tile_flags = self.max_row_length, self.tile_flags
         for r in range(1, self.height - 1):
             for c in range(1, self.width - 1):
-                if isinstance(self.grid[r][c], FloorCube) and (c, r) != player_start_pos:
+                if tile_flags[r * stride + c] & TILE_SPAWNABLE and (c, r) != player_start_pos:
                     possible_spawn_points.append((c, r))
         
-        random.shuffle(possible_spawn_points)
+        self.rng.shuffle(possible_spawn_points)
         
-        for i in range(min(num_npcs_to_spawn, len(possible_spawn_points))):
+        spawn_count = min(num_npcs_to_spawn, len(possible_spawn_points))
+        if batch_npcs and np is None:
+            print("Warning: NumPy is not installed, so NPCs will not be batched.")
+            batch_npcs = False
+        if batch_npcs:
+            self.npc_batch = NPCBatch(self, capacity=spawn_count)
+
+        for i in range(spawn_count):
             grid_x, grid_y = possible_spawn_points[i]
-            npc_type = random.choice(allowed_npc_types)
-            new_npc = NPC(grid_x, grid_y, self, npc_type=npc_type)
+            npc_type = self.rng.choice(allowed_npc_types)
+            if self.npc_batch:
+                new_npc = self.npc_batch.spawn(grid_x, grid_y, npc_type, load_assets=self.load_assets)
+            else:
+                new_npc = NPC(grid_x, grid_y, self, npc_type=npc_type, load_assets=self.load_assets)
             self.npcs.append(new_npc)
 
+    def _build_tile_codes(self):
+        """Fills tile_codes from the cube grid and derives tile_flags from them."""
+        stride = self.max_row_length
+        for r, row in enumerate(self.grid):
+            self.tile_codes[r * stride:r * stride + len(row)] = bytes(cube.tile_code for cube in row)
+        self.tile_flags[:] = self.tile_codes.translate(TILE_FLAGS)
+
     def _update_wall_adjacencies(self):
-        """Updates wall cubes to know if they have adjacent walls, for drawing borders correctly."""
+        """Records which neighbours of each wall are walls too, for drawing borders correctly."""
+        stride, codes, masks = self.max_row_length, self.tile_codes, self.wall_masks
         for r in range(self.height):
             for c in range(self.width):
-                current_cube = self.grid[r][c]
-                if isinstance(current_cube, WallCube):
-                    current_cube.adjacent_status[0] = 1 if c > 0 and isinstance(self.grid[r][c - 1], WallCube) else -1
-                    current_cube.adjacent_status[1] = 1 if r > 0 and isinstance(self.grid[r - 1][c], WallCube) else -1
-                    current_cube.adjacent_status[2] = 1 if c < self.width - 1 and isinstance(self.grid[r][c + 1], WallCube) else -1
-                    current_cube.adjacent_status[3] = 1 if r < self.height - 1 and isinstance(self.grid[r + 1][c], WallCube) else -1
+                i = r * stride + c
+                mask = 0
+                if codes[i] == TILE_WALL:
+                    if c > 0 and codes[i - 1] == TILE_WALL: mask |= WALL_LEFT
+                    if r > 0 and codes[i - stride] == TILE_WALL: mask |= WALL_UP
+                    if c < self.width - 1 and codes[i + 1] == TILE_WALL: mask |= WALL_RIGHT
+                    if r < self.height - 1 and codes[i + stride] == TILE_WALL: mask |= WALL_DOWN
+                masks[i] = mask
+
+    @property
+    def offset_x(self):
+        """Screen x of the maze origin, as passed to Player.draw and NPC.draw."""
+        return self.camera.offset_x
+
+    @property
+    def offset_y(self):
+        return self.camera.offset_y
+
+    def save_render_state(self):
+        """Remembers the camera and NPC positions that render interpolation starts from. Call before each update."""
+        self.camera.save_render_state()
+        if self.npc_batch:
+            self.npc_batch.save_render_state()
+        else:
+            for npc in self.npcs:
+                npc.save_render_state()
+
+    def get_view_cells(self, grid_x, grid_y):
+        """
+        Returns (col_start, col_end, row_start, row_end) of the cells where entities can be on
+        screen while the player is on the given cell. Worked out from where the camera settles
+        rather than where it is, so NPC simulation doesn't depend on rendering.
+        """
+        camera = self.camera
+        view_x, view_y = camera.target_view((grid_x + 0.5) * GRID_SIZE, (grid_y + 0.5) * STAGGER_HEIGHT_PER_ROW)
+        col_start, col_end = camera.visible_range(0, GRID_SIZE, GRID_SIZE, self.max_row_length, view_x, SCREEN_WIDTH)
+        # Entities on row k - 1 are drawn with layer k, see draw()
+        layer_start, layer_end = camera.visible_range(-STAGGER_HEIGHT_PER_ROW, STAGGER_HEIGHT_PER_ROW,
+                                                      CUBE_FULL_VISUAL_HEIGHT + STAGGER_HEIGHT_PER_ROW,
+                                                      self.height + 1, view_y, SCREEN_HEIGHT)
+        return (col_start - ENTITY_CULL_MARGIN_COLS - VIEW_LAG_MARGIN, col_end + ENTITY_CULL_MARGIN_COLS + VIEW_LAG_MARGIN,
+                layer_start - ENTITY_CULL_MARGIN_ROWS - 1 - VIEW_LAG_MARGIN, layer_end + ENTITY_CULL_MARGIN_ROWS - 1 + VIEW_LAG_MARGIN)
+
+    def update_camera(self, dt, player):
+        """Scrolls the view smoothly towards the player."""
+        self.camera.follow(*player.get_focus_point(), dt)
+
+    def set_cube(self, grid_x, grid_y, cube):
+        """Replaces the cube at the given grid coordinates and refreshes the cached background."""
+        self.grid[grid_y][grid_x] = cube
+        i = grid_y * self.max_row_length + grid_x
+        self.tile_codes[i] = cube.tile_code
+        self.tile_flags[i] = TILE_FLAGS[cube.tile_code]
+        self._update_wall_adjacencies()
+        self._flow_fields.clear()
+        self._sight_ranges = None
+        self._sight_range_cache = None # The level's cached index no longer matches this maze
+        # The cube shows up in layers grid_y and grid_y + 1, and neighbouring walls may redraw their borders.
+        for k in range(grid_y - 1, grid_y + 3):
+            for x_idx in range(grid_x - 1, grid_x + 2):
+                if 0 <= k <= self.height and x_idx >= 0:
+                    self.chunk_cache.discard((x_idx // CHUNK_SIZE, k // CHUNK_SIZE))
+
+    def invalidate_background(self):
+        """Drops every rendered chunk so they are rebuilt on demand. Call after editing the grid."""
+        self.chunk_cache.clear()
+
+    def _layer_top(self, k):
+        """Maze y of the top of depth layer k (see _render_chunk)."""
+        return max(k - 1, 0) * STAGGER_HEIGHT_PER_ROW
+
+    def _draw_layer_tiles(self, surface, k, col_start, col_end, origin_x, origin_y):
+        """
+        Draws the cubes of depth layer k in columns [col_start, col_end) with the maze origin at
+        (origin_x, origin_y): the raised cubes of row k - 1, then the floor tiles of row k.
+        Returns True if anything was drawn.
+        """
+        drew_cubes = False
+        stride, codes, masks = self.max_row_length, self.tile_codes, self.wall_masks
+        if k > 0:
+            row, row_start = self.grid[k - 1], (k - 1) * stride
+            y = origin_y + (k - 1) * STAGGER_HEIGHT_PER_ROW
+            for x_idx in range(col_start, min(col_end, len(row))):
+                if codes[row_start + x_idx] != TILE_FLOOR:
+                    row[x_idx].draw(surface, origin_x + x_idx * GRID_SIZE, y, masks[row_start + x_idx])
+                    drew_cubes = True
+        if k < self.height:
+            row, row_start = self.grid[k], k * stride
+            y = origin_y + k * STAGGER_HEIGHT_PER_ROW
+            for x_idx in range(col_start, min(col_end, len(row))):
+                if codes[row_start + x_idx] == TILE_FLOOR:
+                    row[x_idx].draw(surface, origin_x + x_idx * GRID_SIZE, y)
+                    drew_cubes = True
+        return drew_cubes
+
+    def _render_chunk(self, key):
+        """
+        Renders one chunk of the static background: CHUNK_SIZE columns by CHUNK_SIZE depth layers.
+
+        Layer k holds everything that shared the sort key of row k in the old per-frame sort:
+        the raised cubes (walls, rocks, wood) of row k - 1 followed by the floor tiles of row k.
+        Keeping the layers separate lets entities still be slotted in between them, so walls
+        in front of an entity keep occluding it.
+        Returns (layers, size in bytes); each layer is (surface, y) with y relative to the maze
+        origin, or None if it is empty.
+        """
+        chunk_x, chunk_y = key
+        col_start = chunk_x * CHUNK_SIZE
+        col_end = min(col_start + CHUNK_SIZE, self.max_row_length)
+        strip_width = (col_end - col_start) * GRID_SIZE
+        layers, size = [], 0
+        for k in range(chunk_y * CHUNK_SIZE, min((chunk_y + 1) * CHUNK_SIZE, self.height + 1)):
+            strip_top = self._layer_top(k)
+            strip_height = CUBE_FULL_VISUAL_HEIGHT + (k - max(k - 1, 0)) * STAGGER_HEIGHT_PER_ROW
+            strip = pygame.Surface((strip_width, strip_height), pygame.SRCALPHA)
+            if self._draw_layer_tiles(strip, k, col_start, col_end, -col_start * GRID_SIZE, -strip_top):
+                layers.append((strip, strip_top))
+                size += strip.get_pitch() * strip_height
+            else:
+                layers.append(None)
+        return layers, size
+
+    def update_npcs(self, dt, player):
+        """Updates every NPC that needs it and removes the ones whose death animation has finished."""
+        if self.npc_batch:
+            self.npc_batch.update(dt, player)
+            finished = self.npc_batch.release_finished()
+        else:
+            finished = self.npc_scheduler.update(dt, player, self.npcs)
+        if finished:
+            self.npcs = [npc for npc in self.npcs if npc not in finished]
+            for npc in finished:
+                self._untrack_entity(npc)
+
+    def _build_flow_field(self, origin_x, origin_y, passable_flags, radius=FLOW_FIELD_RADIUS):
+        """
+        Breadth-first search outwards from the origin cell over tiles with any of passable_flags,
+        up to radius moves away, so the cost doesn't grow with the map.
+        Returns (steps, distances), dicts keyed by tile_codes index over the cells reached: steps holds
+        the FLOW_STEPS code of the first move along a shortest path to the origin (0 at the origin),
+        distances the path length in moves.
+        """
+        stride, width, flags = self.max_row_length, self.width, self.tile_flags
+        start = origin_y * stride + origin_x
+        steps, distances = {start: 0}, {start: 0}
+        queue = deque([start])
+        while queue:
+            i = queue.popleft()
+            next_distance = distances[i] + 1
+            if next_distance > radius:
+                continue
+            x = i % stride
+            # Each neighbour of i reaches i with the opposite step: from above it steps down, etc.
+            for j, step in ((i - stride, 2), (i + stride, 1), (i - 1 if x > 0 else -1, 4), (i + 1 if x < width - 1 else -1, 3)):
+                if 0 <= j < len(flags) and j not in distances and flags[j] & passable_flags:
+                    distances[j] = next_distance
+                    steps[j] = step
+                    queue.append(j)
+        return steps, distances
+
+    def _get_flow_field(self, player, can_fly):
+        origin = (player.grid_x, player.grid_y)
+        if origin != self._flow_origin:
+            self._flow_origin = origin
+            self._flow_fields.clear()
+        passable_flags = TILE_WALKABLE | TILE_FLY_OVER if can_fly else TILE_WALKABLE
+        field = self._flow_fields.get(passable_flags)
+        if field is None:
+            field = self._build_flow_field(*origin, passable_flags)
+            self._flow_fields[passable_flags] = field
+        return field
+
+    def get_chase_step(self, grid_x, grid_y, player, can_fly=False):
+        """
+        Returns the (dx, dy) of the next move along a shortest path from the given cell to the
+        player, or None if the player is unreachable from there or more than FLOW_FIELD_RADIUS
+        moves away. With can_fly, rocks and wood count as passable (demons fly over them).
+        """
+        if not (0 <= grid_y < self.height and 0 <= grid_x < self.width):
+            return None
+        steps, _ = self._get_flow_field(player, can_fly)
+        step = steps.get(grid_y * self.max_row_length + grid_x)
+        return FLOW_STEPS[step] if step else None
+
+    def get_path_distance(self, grid_x, grid_y, player, can_fly=False):
+        """Returns the number of moves from the given cell to the player, or -1 if unreachable within FLOW_FIELD_RADIUS."""
+        if not (0 <= grid_y < self.height and 0 <= grid_x < self.width):
+            return -1
+        _, distances = self._get_flow_field(player, can_fly)
+        return distances.get(grid_y * self.max_row_length + grid_x, -1)
+
+    def build_sight_ranges(self, max_range=MAX_DETECTION_RANGE):
+        """
+        Builds the line-of-sight index: for every cell an NPC can stand on (including the obstacles
+        demons fly over) and every facing direction, how many cells ahead it can see. Sight reaches
+        up to max_range cells and stops at the first tile that isn't walkable.
+        Returns a bytearray with 4 bytes per cell, indexed (y * max_row_length + x) * 4 + FACING_INDEX[facing].
+        """
+        stride, width, height, flags = self.max_row_length, self.width, self.height, self.tile_flags
+        sight_ranges = bytearray(len(flags) * 4)
+        for facing, (dx, dy) in FACING_STEPS.items():
+            f = FACING_INDEX[facing]
+            lines = ([range(y * stride, y * stride + width) for y in range(height)] if dx else
+                     [range(x, height * stride, stride) for x in range(width)])
+            for line in lines:
+                # Walk each line against the facing, counting the run of walkable cells ahead
+                run = 0
+                for i in (reversed(line) if dx + dy > 0 else line):
+                    if flags[i] & (TILE_WALKABLE | TILE_FLY_OVER):
+                        sight_ranges[i * 4 + f] = min(run, max_range)
+                    run = run + 1 if flags[i] & TILE_WALKABLE else 0
+        return sight_ranges
+
+    @property
+    def sight_ranges(self):
+        if self._sight_ranges is None:
+            self._sight_ranges = self.build_sight_ranges()
+            if self._sight_range_cache is not None:
+                self._sight_range_cache[self.level_number] = self._sight_ranges
+        return self._sight_ranges
+
+    def get_sight_range(self, grid_x, grid_y, facing_direction):
+        """Returns how many cells ahead can be seen from a cell when facing the given direction."""
+        if 0 <= grid_y < self.height and 0 <= grid_x < self.width:
+            return self.sight_ranges[(grid_y * self.max_row_length + grid_x) * 4 + FACING_INDEX[facing_direction]]
+        return 0
+
+    def get_sight_distance(self, grid_x, grid_y, facing_direction, target_x, target_y):
+        """Returns how many cells ahead the target cell is if it can be seen from a cell facing the given direction, else 0."""
+        dx, dy = FACING_STEPS[facing_direction]
+        offset_x, offset_y = target_x - grid_x, target_y - grid_y
+        if (offset_y if dx else offset_x) != 0:
+            return 0
+        distance = offset_x * dx + offset_y * dy
+        return distance if 0 < distance <= self.get_sight_range(grid_x, grid_y, facing_direction) else 0
+
+    def wake_npc(self, npc):
+        """Brings a sleeping NPC up to date (see NPCScheduler), before something else changes its state."""
+        if self.npc_scheduler:
+            self.npc_scheduler.wake(npc)
+
+    def get_occupant(self, grid_x, grid_y):
+        """Returns the entity standing on the given cell, or None."""
+        if 0 <= grid_y < self.height and 0 <= grid_x < self.max_row_length:
+            return self.occupancy[grid_y][grid_x]
+        return None
+
+    def place_entity(self, entity):
+        """Registers an entity on the cell at its grid_x/grid_y."""
+        self.occupancy[entity.grid_y][entity.grid_x] = entity
+        self._track_entity(entity)
+
+    def move_entity(self, entity, old_grid_x, old_grid_y):
+        """Moves an entity's occupancy entry after its grid_x/grid_y changed."""
+        if self.occupancy[old_grid_y][old_grid_x] is entity:
+            self.occupancy[old_grid_y][old_grid_x] = None
+        self.occupancy[entity.grid_y][entity.grid_x] = entity
+        self._track_entity(entity)
+
+    def remove_entity(self, entity):
+        """Frees the cell an entity stands on, e.g. when an NPC dies and stops blocking it. It is still drawn."""
+        if self.occupancy[entity.grid_y][entity.grid_x] is entity:
+            self.occupancy[entity.grid_y][entity.grid_x] = None
+
+    def tile_code(self, grid_x, grid_y):
+        """Returns the tile code (cube.TILE_*) at the given grid coordinates, TILE_EMPTY if outside the map."""
+        if 0 <= grid_y < self.height and 0 <= grid_x < self.max_row_length:
+            return self.tile_codes[grid_y * self.max_row_length + grid_x]
+        return TILE_EMPTY
+
+    def has_tile_flag(self, grid_x, grid_y, flag):
+        """Checks a tile property flag (cube.TILE_WALKABLE, TILE_FLY_OVER, TILE_SPAWNABLE) at the given grid coordinates."""
+        if 0 <= grid_y < self.height and 0 <= grid_x < self.width:
+            return bool(self.tile_flags[grid_y * self.max_row_length + grid_x] & flag)
+        return False
 
     def is_walkable(self, grid_x, grid_y):
         """Checks if a tile at the given grid coordinates is walkable."""
         if 0 <= grid_y < self.height and 0 <= grid_x < self.width:
-            return isinstance(self.grid[grid_y][grid_x], FloorCube)
+            return bool(self.tile_flags[grid_y * self.max_row_length + grid_x] & TILE_WALKABLE)
         return False
 
-    def draw(self, surface, player, npcs_list):
-        """Draws the entire maze, including cubes and entities, in the correct Z-order."""
-        render_ables = []
-        for y_idx, row in enumerate(self.grid):
-            for x_idx, cube in enumerate(row):
-                screen_x = self.offset_x + x_idx * GRID_SIZE
-                screen_y = self.offset_y + y_idx * STAGGER_HEIGHT_PER_ROW
-                sort_key = screen_y if isinstance(cube, FloorCube) else screen_y + STAGGER_HEIGHT_PER_ROW
-                render_ables.append({'sort_key': sort_key, 'type': 'cube', 'object': cube, 'pos': (screen_x, screen_y)})
-
-        all_entities = [npc for npc in npcs_list if npc] + ([player] if player else [])
-        for entity in all_entities:
-            sort_key = self.offset_y + entity.grid_y * STAGGER_HEIGHT_PER_ROW + STAGGER_HEIGHT_PER_ROW
-            sort_key += entity.current_screen_y / 1000.0
-            render_ables.append({'sort_key': sort_key, 'type': 'entity', 'object': entity})
-
-        render_ables.sort(key=lambda item: item['sort_key'])
-
-        for item in render_ables:
-            if item['type'] == 'cube':
-                item['object'].draw(surface, item['pos'][0], item['pos'][1])
-            elif item['type'] == 'entity':
-                item['object'].draw(surface, self.offset_x, self.offset_y)
+    def _track_entity(self, entity):
+        """Moves an entity into the bucket of the row and column chunk it stands on, if it changed bucket."""
+        key = (entity.grid_y, entity.grid_x // CHUNK_SIZE)
+        if self._entity_bucket_of.get(entity) == key:
+            return
+        self._untrack_entity(entity)
+        row, chunk_x = key
+        self._entity_buckets[row].setdefault(chunk_x, []).append(entity)
+        self._entity_bucket_of[entity] = key
+
+    def _untrack_entity(self, entity):
+        """Drops an entity from its bucket, so it is no longer drawn."""
+        key = self._entity_bucket_of.pop(entity, None)
+        if key is not None:
+            row, chunk_x = key
+            row_buckets = self._entity_buckets[row]
+            row_buckets[chunk_x].remove(entity)
+            if not row_buckets[chunk_x]:
+                del row_buckets[chunk_x]
+
+    def draw(self, surface, alpha=1.0):
+        """
+        Draws the visible part of the maze, including cubes and entities, in the correct Z-order.
+        alpha interpolates the camera and entities between the last two updates (1.0 draws the latest).
+        """
+        camera = self.camera
+        offset_x, offset_y = camera.get_offset(alpha)
+        col_start, col_end = camera.visible_range(0, GRID_SIZE, GRID_SIZE, self.max_row_length, -offset_x, SCREEN_WIDTH)
+        # Layer k spans from row k - 1's top down to the bottom of row k's floor
+        layer_start, layer_end = camera.visible_range(-STAGGER_HEIGHT_PER_ROW, STAGGER_HEIGHT_PER_ROW,
+                                                      CUBE_FULL_VISUAL_HEIGHT + STAGGER_HEIGHT_PER_ROW,
+                                                      self.height + 1, -offset_y, SCREEN_HEIGHT)
+
+        # Layer k holds the raised cubes of row k - 1, so entities standing on row k - 1 go right
+        # after it: in front of their own row's walls, behind the walls of the rows below.
+        chunk_col_start, chunk_col_end = col_start // CHUNK_SIZE, (col_end - 1) // CHUNK_SIZE + 1
+        first_k = max(layer_start - ENTITY_CULL_MARGIN_ROWS, 0)
+        last_k = min(layer_end + ENTITY_CULL_MARGIN_ROWS, self.height + 1)
+        entity_col_start, entity_col_end = col_start - ENTITY_CULL_MARGIN_COLS, col_end + ENTITY_CULL_MARGIN_COLS
+        entity_chunks = range(max(entity_col_start, 0) // CHUNK_SIZE, (entity_col_end - 1) // CHUNK_SIZE + 1)
+        buckets, row_entities = self._entity_buckets, self._row_entities
+        for k in range(first_k, last_k):
+            if layer_start <= k < layer_end and col_start < col_end:
+                chunk_y, layer_index = divmod(k, CHUNK_SIZE)
+                for chunk_x in range(chunk_col_start, chunk_col_end):
+                    layer = self.chunk_cache.get((chunk_x, chunk_y))[layer_index]
+                    if layer:
+                        strip, strip_top = layer
+                        surface.blit(strip, (offset_x + chunk_x * CHUNK_SIZE * GRID_SIZE, offset_y + strip_top))
+            if k > 0 and buckets[k - 1]:
+                row_buckets = buckets[k - 1]
+                row_entities.clear()
+                for chunk_x in entity_chunks:
+                    bucket = row_buckets.get(chunk_x)
+                    if bucket:
+                        for entity in bucket:
+                            if entity_col_start <= entity.grid_x < entity_col_end:
+                                row_entities.append(entity)
+                if len(row_entities) > 1:
+                    row_entities.sort(key=_SCREEN_X_KEY)
+                    row_entities.sort(key=_SCREEN_Y_KEY)
+                for entity in row_entities:
+                    entity.draw(surface, offset_x, offset_y, alpha)
+        row_entities.clear() # Don't keep removed NPCs alive until the next frame
+        self.chunk_cache.end_frame()
 
 class LevelController:
     """Manages loading levels and tracking player progress."""
-    def __init__(self, map_file='map.txt', progress_file='progress.txt'):
+    def __init__(self, map_file='map.txt', progress_file='progress.txt', chunk_cache_budget=CHUNK_CACHE_BUDGET):
+        self.chunk_cache_budget = chunk_cache_budget
         self.levels = self._load_levels_from_file(map_file)
+        self._sight_range_cache = {} # level number -> line-of-sight index, built when the level is first played
         self.progress_file = progress_file
         self.unlocked_levels = self._load_progress()
 
@@ -133,16 +534,8 @@ class LevelController:
                 level_num = int(level_num_str)
                 map_data = [line for line in lines[1:] if not line.startswith('#ENDLEVEL')]
                 
-                grid = []
-                for row_data in map_data:
-                    row = []
-                    for char in row_data:
-                        if char == 'W': row.append(WallCube())
-                        elif char == 'R': row.append(RockCube())
-                        elif char == 'O': row.append(WoodCube())
-                        elif char == 'P': row.append(FloorCube())
-                        else: row.append(FloorCube())
-                    grid.append(row)
+                # Cells share one cube instance per type; per-cell state is kept by the Maze
+                grid = [[CubeFactory.get_cube(char) for char in row_data] for row_data in map_data]
                 levels[level_num] = grid
         except FileNotFoundError:
             print(f"Error: Map file '{filename}' not found.")
@@ -166,10 +559,15 @@ class LevelController:
         """Returns the number of levels the player has access to."""
         return self.unlocked_levels
 
-    def get_level(self, level_number):
-        """Returns a Maze object for the requested level number."""
+    def get_level(self, level_number, load_assets=True, seed=None):
+        """
+        Returns a Maze object for the requested level number. load_assets=False skips NPC sprites.
+        seed seeds the maze's RNG; by default a random seed is drawn (and kept as maze.seed).
+        """
         if level_number in self.levels:
-            return Maze(self.levels[level_number], PLAYER_START_POS, level_number)
+            maze = Maze(self.levels[level_number], PLAYER_START_POS, level_number, self.chunk_cache_budget,
+                        sight_range_cache=self._sight_range_cache, load_assets=load_assets, seed=seed)
+            return maze
         return None
 
     def unlock_next_level(self, completed_level_number):
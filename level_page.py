@@ -1,6 +1,7 @@
 # level_page.py
 import pygame
 import sys
+from text_cache import FONT_PATH, get_font, get_sys_font, render_text
 
 class LevelPage:
     """Displays the level selection screen."""
@@ -21,12 +22,11 @@ class LevelPage:
 
         # --- Font Loading ---
         try:
-            font_path = "./assets/font.ttf"
-            self.title_font = pygame.font.Font(font_path, 72)
-            self.level_font = pygame.font.Font(font_path, 48)
+            self.title_font = get_font(FONT_PATH, 72)
+            self.level_font = get_font(FONT_PATH, 48)
         except pygame.error:
-            self.title_font = pygame.font.SysFont("arial", 60, bold=True)
-            self.level_font = pygame.font.SysFont("arial", 40, bold=True)
+            self.title_font = get_sys_font("arial", 60, bold=True)
+            self.level_font = get_sys_font("arial", 40, bold=True)
 
         # --- Colors and Layout ---
         self.text_color = (255, 255, 255)
@@ -65,12 +65,20 @@ class LevelPage:
                         return level_num
         return None
 
+    def get_hovered_level(self):
+        """Returns the level number whose box is under the mouse, or None."""
+        mouse_pos = pygame.mouse.get_pos()
+        for level_num, rect in self.level_rects.items():
+            if rect.collidepoint(mouse_pos):
+                return level_num
+        return None
+
     def draw(self):
         """Draws the entire level selection screen."""
         mouse_pos = pygame.mouse.get_pos()
         
         # Draw Title
-        title_surf = self.title_font.render("Level", True, self.text_color)
+        title_surf = render_text(self.title_font, "Level", self.text_color)
         title_rect = title_surf.get_rect(center=(self.screen_rect.centerx, 100))
         self.screen.blit(title_surf, title_rect)
 
@@ -91,6 +99,6 @@ class LevelPage:
             pygame.draw.rect(self.screen, color, rect, border_radius=10)
             pygame.draw.rect(self.screen, self.text_color, rect, 2, border_radius=10)
 
-            level_text_surf = self.level_font.render(str(level_num), True, self.text_color)
+            level_text_surf = render_text(self.level_font, str(level_num), self.text_color)
             level_text_rect = level_text_surf.get_rect(center=rect.center)
             self.screen.blit(level_text_surf, level_text_rect)
\ No newline at end of file
@@ -5,11 +5,18 @@ from game_manager import GameManager
 
 def main():
     """Main function to initialize and run the game."""
-    pygame.init()
-    pygame.mixer.init()
+    headless = '--headless' in sys.argv
+    if not headless: # In headless mode GameManager initialises pygame itself, on the dummy drivers
+        pygame.init()
+        pygame.mixer.init()
 
     # --- Initialize and run the game manager ---
-    game_manager = GameManager()
+    # Pass --dirty-rects to present only the changed parts of each frame (helps software rendering),
+    # --record DIR to save a replayable recording of every level played into DIR (see replay.py),
+    # and --headless to run without a window or sound on the SDL dummy drivers (see headless.py)
+    record_dir = sys.argv[sys.argv.index('--record') + 1] if '--record' in sys.argv[:-1] else None
+    game_manager = GameManager(dirty_rects='--dirty-rects' in sys.argv, headless=headless,
+                               record_dir=record_dir)
     game_manager.run()
 
     # --- Cleanup ---
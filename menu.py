@@ -3,10 +3,15 @@ import pygame
 import sys
 from player import Player, TARGET_PLAYER_HEIGHT
 from npc import NPC
+from sprite_cache import get_sprite_variant
+from text_cache import FONT_PATH, get_font, get_sys_font, render_text
+
+SHOWCASE_SCALE = 1.3 # Showcase characters are drawn larger than in-game
+LOADING_BAR_SIZE = (300, 16)
 
 class Menu:
     """Manages the main menu screen, its buttons, and character showcase."""
-    def __init__(self, screen):
+    def __init__(self, screen, asset_loader=None):
         self.screen = screen
         self.screen_rect = screen.get_rect()
         
@@ -15,20 +20,21 @@ class Menu:
         
         # --- Font Loading ---
         try:
-            font_path = "./assets/font.ttf"
-            self.title_font = pygame.font.Font(font_path, 72)
-            self.vs_font = pygame.font.Font(font_path, 90)
-            self.button_font = pygame.font.Font(font_path, 65)
+            self.title_font = get_font(FONT_PATH, 72)
+            self.vs_font = get_font(FONT_PATH, 90)
+            self.button_font = get_font(FONT_PATH, 65)
+            self.loading_font = get_font(FONT_PATH, 32)
         except pygame.error as e:
-            print(f"Warning: Could not load custom font at '{font_path}'. Falling back to default font.")
-            self.title_font = pygame.font.SysFont("arial", 60, bold=True)
-            self.vs_font = pygame.font.SysFont("arial", 80, bold=True)
-            self.button_font = pygame.font.SysFont("arial", 40,bold=True),
+            print(f"Warning: Could not load custom font at '{FONT_PATH}'. Falling back to default font.")
+            self.title_font = get_sys_font("arial", 60, bold=True)
+            self.vs_font = get_sys_font("arial", 80, bold=True)
+            self.button_font = get_sys_font("arial", 40, bold=True)
+            self.loading_font = get_sys_font("arial", 24, bold=True)
 
         # --- Title and UI Text ---
-        self.title_surface = self.title_font.render("THE DUNGEON WARRIOR", True, (255, 255, 255))
+        self.title_surface = render_text(self.title_font, "THE DUNGEON WARRIOR", (255, 255, 255))
         self.title_rect = self.title_surface.get_rect(center=(self.screen_rect.centerx, 100))
-        self.vs_text_surface = self.vs_font.render("VS", True, (200, 200, 220))
+        self.vs_text_surface = render_text(self.vs_font, "VS", (200, 200, 220))
         self.vs_text_rect = self.vs_text_surface.get_rect(center=(self.screen_rect.centerx - 30, self.screen_rect.centery + 250))
 
         # --- Button System ---
@@ -36,9 +42,17 @@ class Menu:
         self._create_text_buttons()
 
         # --- Character Showcase Setup ---
+        # With an asset loader the showcase is built once the loader has finished; until then
+        # a loading bar is drawn in its place.
+        self.asset_loader = asset_loader
         self.showcase_player, self.showcase_npcs = {}, []
-        self._setup_characters()
+        self.showcase_ready = False
         self.showcase_timer, self.showcase_switch_interval = 0, 2 
+        self.loading_text_surface = render_text(self.loading_font, "Loading...", (255, 255, 255))
+        self.loading_bar_rect = pygame.Rect((0, 0), LOADING_BAR_SIZE)
+        self.loading_bar_rect.midbottom = (self.screen_rect.centerx, self.screen_rect.bottom - 40)
+        if asset_loader is None:
+            self._setup_characters()
 
     def _load_image(self, path, scale_to=None):
         try:
@@ -52,13 +66,13 @@ class Menu:
     def _create_text_buttons(self):
         start_y = self.screen_rect.centery - 60
         for i, text in enumerate(['Start', 'Exit']):
-            surface = self.button_font.render(text, True, (255, 255, 255))
+            surface = render_text(self.button_font, text, (255, 255, 255))
             rect = pygame.Rect(0, 0, 220, 70)
             rect.center = (self.screen_rect.right - 150, start_y + i * 100)
             self.buttons.append({'surface': surface, 'rect': rect, 'action': text.lower(), 'hovered': False})
 
     def _setup_characters(self):
-        ground_y = self.screen_rect.height - (TARGET_PLAYER_HEIGHT * 1.3) + 60
+        ground_y = self.screen_rect.height - (TARGET_PLAYER_HEIGHT * SHOWCASE_SCALE) + 60
         player = Player(0, 0, None)
         player.facing_direction = "right"
         player.current_screen_x, player.current_screen_y = 180, ground_y
@@ -76,6 +90,7 @@ class Menu:
             npc.current_screen_x, npc.current_screen_y = x, y
             self.showcase_npcs.append({'object': npc, 'animations': anims, 'current_anim_index': 0})
         self._update_character_animation_states()
+        self.showcase_ready = True
 
     def _update_character_animation_states(self):
         p_info = self.showcase_player
@@ -89,22 +104,58 @@ class Menu:
             npc.is_moving_animation_active = 'walk' in n_anim or 'fly' in n_anim
             if npc.is_moving_animation_active: npc.facing_direction = n_anim.split('_')[-1]
 
+    def get_loading_rect(self):
+        """Returns the screen area covered by the loading indicator."""
+        text_rect = self.loading_text_surface.get_rect(midbottom=(self.loading_bar_rect.centerx, self.loading_bar_rect.top - 8))
+        return text_rect.union(self.loading_bar_rect)
+
+    def _draw_loading_indicator(self):
+        text_rect = self.loading_text_surface.get_rect(midbottom=(self.loading_bar_rect.centerx, self.loading_bar_rect.top - 8))
+        self.screen.blit(self.loading_text_surface, text_rect)
+        fill_rect = self.loading_bar_rect.copy()
+        fill_rect.width = int(fill_rect.width * self.asset_loader.progress)
+        pygame.draw.rect(self.screen, (200, 200, 220), fill_rect)
+        pygame.draw.rect(self.screen, (255, 255, 255), self.loading_bar_rect, 2)
+
     def _draw_characters(self):
+        if not self.showcase_ready:
+            self._draw_loading_indicator()
+            return
+
         player_obj = self.showcase_player['object']
         if player_obj.current_image:
-            w, h = player_obj.current_image.get_size()
-            scaled_image = pygame.transform.scale(player_obj.current_image, (int(w * 1.3), int(h * 1.3)))
+            scaled_image = get_sprite_variant(player_obj.current_image, scale=SHOWCASE_SCALE)
             self.screen.blit(scaled_image, (player_obj.current_screen_x, player_obj.current_screen_y))
 
         for npc_info in self.showcase_npcs:
             npc_obj = npc_info['object']
-            image_to_draw = npc_obj.current_base_image
-            if image_to_draw:
-                if npc_obj.sprite_flipped: image_to_draw = pygame.transform.flip(image_to_draw, True, False)
-                w, h = image_to_draw.get_size()
-                scaled_image = pygame.transform.scale(image_to_draw, (int(w * 1.3), int(h * 1.3)))
+            if npc_obj.current_base_image:
+                scaled_image = get_sprite_variant(npc_obj.current_base_image, flip=npc_obj.sprite_flipped, scale=SHOWCASE_SCALE)
                 self.screen.blit(scaled_image, (npc_obj.current_screen_x, npc_obj.current_screen_y))
 
+    def get_showcase_draw_states(self):
+        """Returns (screen rect tuple, image, flipped) for every showcase character, matching _draw_characters."""
+        states = []
+        if not self.showcase_ready:
+            return states
+        player_obj = self.showcase_player['object']
+        if player_obj.current_image:
+            w, h = player_obj.current_image.get_size()
+            rect = pygame.Rect(player_obj.current_screen_x, player_obj.current_screen_y, int(w * SHOWCASE_SCALE), int(h * SHOWCASE_SCALE))
+            states.append((tuple(rect), player_obj.current_image, False))
+
+        for npc_info in self.showcase_npcs:
+            npc_obj = npc_info['object']
+            if npc_obj.current_base_image:
+                w, h = npc_obj.current_base_image.get_size()
+                rect = pygame.Rect(npc_obj.current_screen_x, npc_obj.current_screen_y, int(w * SHOWCASE_SCALE), int(h * SHOWCASE_SCALE))
+                states.append((tuple(rect), npc_obj.current_base_image, npc_obj.sprite_flipped))
+        return states
+
+    def get_hovered_buttons(self):
+        """Returns the rect tuples of the buttons currently drawn with a hover highlight."""
+        return {tuple(button['rect']) for button in self.buttons if button['hovered']}
+
     def run(self, events):
         """Processes events and returns the chosen action."""
         mouse_pos = pygame.mouse.get_pos()
@@ -121,6 +172,11 @@ class Menu:
 
     def update_showcase(self, dt):
         """Updates the character animations."""
+        if not self.showcase_ready:
+            if self.asset_loader.is_done():
+                self._setup_characters()
+            return
+
         self.showcase_timer += dt
         if self.showcase_timer >= self.showcase_switch_interval:
             self.showcase_timer = 0
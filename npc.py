@@ -1,25 +1,34 @@
 # npc.py
 import pygame
-import random
 import math
-from cube import FloorCube, RockCube, WoodCube
+import random
+from cube import TILE_FLY_OVER
+from sprite_cache import get_sprite_variant, load_frames
 
 # Constants
 GRID_SIZE = 80
 STAGGER_HEIGHT_PER_ROW = int(GRID_SIZE * 0.8)
 ANIMATION_SPEED = 0.1 
 GRID_MOVE_DURATION = 0.3
-NPC_HURT_SOUND = None
-# --- NEW: Load NPC hurt sound once at module level for efficiency ---
-try:
-    pygame.mixer.init()
-    NPC_HURT_SOUND = pygame.mixer.Sound('./assets/npc.mp3')
-except pygame.error as e:
-    print(f"Warning: Could not load npc.mp3 sound: {e}")
-    NPC_HURT_SOUND = None
+NPC_HURT_SOUND = None # Shared by all NPCs, filled in by load_sounds()
+LOD_FULL, LOD_MID, LOD_FAR = range(3) # Simulation level of detail tiers, see the lod_* config entries
+
+def load_sounds():
+    """Loads the NPC hurt sound once for all NPCs. Needs the mixer to be initialised."""
+    global NPC_HURT_SOUND
+    try:
+        NPC_HURT_SOUND = pygame.mixer.Sound('./assets/npc.mp3')
+    except pygame.error as e:
+        print(f"Warning: Could not load npc.mp3 sound: {e}")
+        NPC_HURT_SOUND = None
+    return NPC_HURT_SOUND
 
 # --- UPDATED NPC CONFIGURATIONS ---
 # Orcs will use their death_sprite_sheet, but the Demon will not.
+# The lod_* entries set an NPC's simulation level of detail by how many cells off screen it is
+# (see NPCScheduler): full rate on screen and up to lod_full_range; updated every
+# lod_mid_step_interval steps without animating up to lod_mid_range; and every lod_far_step_interval
+# steps, without animating or sliding between cells, beyond that.
 NPC_CONFIGS = {
     "orc": {
         "sprite_sheet_path": "./assets/NPC/Orc/orc3_walk/orc3_walk_full.png",
@@ -39,7 +48,8 @@ NPC_CONFIGS = {
         "health": 1, "detection_range": 3, "attack_range": 2,
         "attack_interval": 1.5,
         "attack_duration": 0.8,
-        "death_duration": 1.5
+        "death_duration": 1.5,
+        "lod_full_range": 2, "lod_mid_range": 10, "lod_mid_step_interval": 3, "lod_far_step_interval": 10
     },
     "orc2": {
         "sprite_sheet_path": "./assets/NPC/Orc/orc1_walk_full.png",
@@ -59,7 +69,8 @@ NPC_CONFIGS = {
         "health": 1, "detection_range": 2, "attack_range": 1,
         "attack_interval": 2.5,
         "attack_duration": 1.0,
-        "death_duration": 1.5
+        "death_duration": 1.5,
+        "lod_full_range": 2, "lod_mid_range": 10, "lod_mid_step_interval": 3, "lod_far_step_interval": 10
     },
     "demon": {
         "sprite_sheet_path": "./assets/NPC/Bird/FLYING.png",
@@ -79,14 +90,51 @@ NPC_CONFIGS = {
         "health": 1, "detection_range": 5, "attack_range": 1,
         "attack_interval": 2.0,
         "attack_duration": 0.7,
-        "death_duration": 0.7 # Matched to attack duration
+        "death_duration": 0.7, # Matched to attack duration
+        # Demons cover ground quickly, so they keep a finer level of detail for longer
+        "lod_full_range": 4, "lod_mid_range": 12, "lod_mid_step_interval": 2, "lod_far_step_interval": 8
     }
 }
 
+def _sprite_sheet_specs(config):
+    """Yields (path, animations, frame_w, frame_h, target_w, target_h) for every sheet an NPC type uses."""
+    scale = config["scale_factor"]
+    yield (config["sprite_sheet_path"], config["animations"],
+           config["orig_frame_width"], config["orig_frame_height"],
+           int(config["orig_frame_width"] * scale), int(config["orig_frame_height"] * scale))
+    yield (config["attack_sprite_sheet_path"], config["attack_animations"],
+           config["attack_frame_width"], config["attack_frame_height"],
+           int(config["attack_frame_width"] * scale), int(config["attack_frame_height"] * scale))
+    # Only Orcs define a death sheet; the Demon reuses its attack animation.
+    if config.get("death_sprite_sheet_path"):
+        yield (config["death_sprite_sheet_path"], config["death_animations"],
+               config["death_frame_width"], config["death_frame_height"],
+               int(config["death_frame_width"] * scale), int(config["death_frame_height"] * scale))
+
+def preload_sprites(npc_types=None):
+    """Decodes the sprite sheets of the given NPC types (all by default) into the shared sprite cache."""
+    for npc_type in npc_types or NPC_CONFIGS:
+        for path, anim_dict, w, h, target_w, target_h in _sprite_sheet_specs(NPC_CONFIGS[npc_type]):
+            for row, frames_n in anim_dict.values():
+                load_frames(path, [(i * w, row * h, w, h) for i in range(frames_n)], (target_w, target_h))
+
+def animation_key(npc_type, facing_direction, is_dead, is_attacking, is_moving):
+    """Returns the name of the animation an NPC in the given state plays, or "" when it shows its idle image."""
+    if is_dead:
+        # --- UPDATED: Conditional death animation logic ---
+        # Demons use their attack animation for death; Orcs use their dedicated death animation.
+        return "attack" if npc_type == 'demon' else "death"
+    if is_attacking:
+        return "attack" if npc_type == 'demon' else "attack_" + facing_direction
+    if is_moving:
+        return "fly" if npc_type == 'demon' else "walk_" + facing_direction
+    return ""
+
 class NPC:
-    def __init__(self, initial_grid_x, initial_grid_y, maze, npc_type="orc"):
+    def __init__(self, initial_grid_x, initial_grid_y, maze, npc_type="orc", load_assets=True):
         self.grid_x, self.grid_y = initial_grid_x, initial_grid_y
         self.maze, self.npc_type = maze, npc_type
+        self.load_assets = load_assets # False for headless simulations: no sprites, no images to draw
         self.config = NPC_CONFIGS[npc_type]
 
         self.target_npc_width = int(self.config["orig_frame_width"] * self.config["scale_factor"])
@@ -94,12 +142,14 @@ class NPC:
 
         self.animations = {}
         self.idle_image_base = None
-        self.load_sprites()
-
-        self.current_base_image = self.idle_image_base or pygame.Surface((self.target_npc_width, self.target_npc_height), pygame.SRCALPHA)
-        if not self.idle_image_base: self.current_base_image.fill((255, 0, 255, 150))
-
-        self.facing_direction = random.choice(['up', 'down', 'left', 'right'])
+        self.current_base_image = None
+        if load_assets:
+            self.load_sprites()
+            self.current_base_image = self.idle_image_base or pygame.Surface((self.target_npc_width, self.target_npc_height), pygame.SRCALPHA)
+            if not self.idle_image_base: self.current_base_image.fill((255, 0, 255, 150))
+
+        rng = maze.rng if maze else random # Menu showcase NPCs have no maze
+        self.facing_direction = rng.choice(['up', 'down', 'left', 'right'])
         self.sprite_flipped = False
 
         self.is_moving_animation_active, self.is_grid_moving = False, False
@@ -113,11 +163,13 @@ class NPC:
         self.animation_playback_speed = self.config["animation_playback_speed"]
 
         self.fsm_state = 'idle' 
-        self.fsm_timer = random.uniform(1.5, 4.0)
+        self.fsm_timer = rng.uniform(1.5, 4.0)
         self.current_planned_dx, self.current_planned_dy = 0, 0
         self.steps_to_take, self.blocked_attempts = 0, 0
 
         self.health = self.config["health"]
+        self.lod_tier = LOD_FULL
+        self.lod_pending_time, self.lod_pending_steps = 0.0, 0 # Time not yet simulated at a reduced tier
         self.is_attacking, self.attack_timer, self.attack_cooldown = False, 0.0, 0.0
         self.is_dead, self.death_timer = False, 0.0
         self.is_flying_high = False
@@ -125,41 +177,26 @@ class NPC:
         initial_target_x, initial_target_y = self._calculate_target_screen_pos(self.grid_x, self.grid_y)
         self.current_screen_x, self.current_screen_y = initial_target_x, initial_target_y
         self.target_screen_x, self.target_screen_y = initial_target_x, initial_target_y
+        self.save_render_state()
         self._update_idle_image_and_flip_status()
 
+        if self.maze:
+            self.maze.place_entity(self)
+
     def _load_sprite_logic(self, path, anim_dict, w, h, target_w, target_h):
         if not path: return
         try:
-            sheet = pygame.image.load(path).convert_alpha()
             for anim, (row, frames_n) in anim_dict.items():
                 if frames_n == 0: continue
-                frames = []
-                for i in range(frames_n):
-                    rect = pygame.Rect(i * w, row * h, w, h)
-                    frame = pygame.transform.scale(sheet.subsurface(rect), (target_w, target_h))
-                    frames.append(frame)
-                self.animations[anim] = frames
+                rects = [(i * w, row * h, w, h) for i in range(frames_n)]
+                self.animations[anim] = load_frames(path, rects, (target_w, target_h))
         except Exception as e:
             print(f"ERROR loading NPC sprite from '{path}' for '{self.npc_type}': {e}")
 
     def load_sprites(self):
-        # Load walk/fly animations
-        self._load_sprite_logic(self.config["sprite_sheet_path"], self.config["animations"], 
-                                self.config["orig_frame_width"], self.config["orig_frame_height"],
-                                self.target_npc_width, self.target_npc_height)
-        # Load attack animations
-        self._load_sprite_logic(self.config["attack_sprite_sheet_path"], self.config["attack_animations"],
-                                self.config["attack_frame_width"], self.config["attack_frame_height"],
-                                int(self.config["attack_frame_width"]*self.config["scale_factor"]), 
-                                int(self.config["attack_frame_height"]*self.config["scale_factor"]))
-        
-        # --- NEW: Conditionally load death sprites ---
-        # Only load from a death sheet if it's defined (i.e., for Orcs)
-        if self.config.get("death_sprite_sheet_path"):
-            self._load_sprite_logic(self.config.get("death_sprite_sheet_path"), self.config["death_animations"],
-                                    self.config["death_frame_width"], self.config["death_frame_height"],
-                                    int(self.config["death_frame_width"]*self.config["scale_factor"]),
-                                    int(self.config["death_frame_height"]*self.config["scale_factor"]))
+        # Load walk/fly, attack and (for Orcs) death animations
+        for spec in _sprite_sheet_specs(self.config):
+            self._load_sprite_logic(*spec)
 
         # Set a default idle image
         idle_src = self.config.get("idle_frames_source_anim")
@@ -170,6 +207,8 @@ class NPC:
             
     def take_damage(self, amount):
         if self.is_dead: return
+        if self.maze:
+            self.maze.wake_npc(self) # A sleeping NPC catches up before its state changes
         self.health -= amount
         
         if NPC_HURT_SOUND:
@@ -184,6 +223,8 @@ class NPC:
             self.anim_frame_index = 0
             self.is_grid_moving = False
             self.is_attacking = False
+            if self.maze:
+                self.maze.remove_entity(self) # Corpses no longer block movement or attacks
             print(f"{self.npc_type} has been slain.")
 
 
@@ -215,11 +256,10 @@ class NPC:
 
         if not (0 <= next_grid_y < self.maze.height and 0 <= next_grid_x < self.maze.width): return False 
 
-        target_tile = self.maze.grid[next_grid_y][next_grid_x]
         can_move = self.maze.is_walkable(next_grid_x, next_grid_y)
         
-        if not can_move and self.npc_type == "demon" and isinstance(target_tile, (RockCube, WoodCube)):
-            if random.random() < self.config['fly_over_obstacle_chance']:
+        if not can_move and self.npc_type == "demon" and self.maze.has_tile_flag(next_grid_x, next_grid_y, TILE_FLY_OVER):
+            if self.maze.rng.random() < self.config['fly_over_obstacle_chance']:
                 can_move = True
                 self.is_flying_high = True
         elif can_move and self.is_flying_high:
@@ -227,11 +267,12 @@ class NPC:
 
         if not can_move: return False 
 
-        if player and next_grid_x == player.grid_x and next_grid_y == player.grid_y: return False
-        for npc in other_npcs:
-            if next_grid_x == npc.grid_x and next_grid_y == npc.grid_y and not npc.is_dead: return False
+        # The occupancy grid holds the player and every live NPC
+        if self.maze.get_occupant(next_grid_x, next_grid_y): return False
         
+        old_grid_x, old_grid_y = self.grid_x, self.grid_y
         self.grid_x, self.grid_y = next_grid_x, next_grid_y
+        self.maze.move_entity(self, old_grid_x, old_grid_y)
         self.move_start_screen_x, self.move_start_screen_y = self.current_screen_x, self.current_screen_y
         self.target_screen_x, self.target_screen_y = self._calculate_target_screen_pos(self.grid_x, self.grid_y) 
         self.move_timer, self.is_grid_moving, self.is_moving_animation_active = 0.0, True, True
@@ -247,17 +288,9 @@ class NPC:
         
     def check_player_detection(self, player):
         if self.is_dead: return False
-        dist_x, dist_y = player.grid_x - self.grid_x, player.grid_y - self.grid_y
-        
-        dir_map = {"left": (-1, 0), "right": (1, 0), "up": (0, -1), "down": (0, 1)}
-        facing_dx, facing_dy = dir_map[self.facing_direction]
-
-        if facing_dx != 0 and dist_y == 0 and math.copysign(1, dist_x) == facing_dx:
-            return abs(dist_x) <= self.config["detection_range"]
-        if facing_dy != 0 and dist_x == 0 and math.copysign(1, dist_y) == facing_dy:
-            return abs(dist_y) <= self.config["detection_range"]
-            
-        return False
+        # The maze's line-of-sight index already stops at walls and obstacles
+        distance = self.maze.get_sight_distance(self.grid_x, self.grid_y, self.facing_direction, player.grid_x, player.grid_y)
+        return 0 < distance <= self.config["detection_range"]
 
     def update_fsm(self, dt, player, other_npcs):
         if self.is_dead or self.is_attacking: return
@@ -271,7 +304,7 @@ class NPC:
         elif not player_detected and self.fsm_state == 'chasing':
             print(f"{self.npc_type} lost player. Returning to normal behavior.")
             self.fsm_state = 'idle'
-            self.fsm_timer = random.uniform(1.0, 2.0)
+            self.fsm_timer = self.maze.rng.uniform(1.0, 2.0)
             self.grid_move_duration = self.config["movement_speed_duration"]
 
         self.fsm_timer -= dt
@@ -285,11 +318,16 @@ class NPC:
                 self.anim_frame_index = 0
                 print(f"{self.npc_type} is attacking player!")
             elif not self.is_grid_moving:
-                dx, dy = player.grid_x - self.grid_x, player.grid_y - self.grid_y
-                if abs(dx) > abs(dy):
-                    self.start_grid_move(int(math.copysign(1, dx)), 0, player, other_npcs)
+                # Follow the maze's shared flow field; head straight for the player where it has no path
+                step = self.maze.get_chase_step(self.grid_x, self.grid_y, player, can_fly=self.npc_type == "demon")
+                if step:
+                    self.start_grid_move(*step, player, other_npcs)
                 else:
-                    self.start_grid_move(0, int(math.copysign(1, dy)), player, other_npcs)
+                    dx, dy = player.grid_x - self.grid_x, player.grid_y - self.grid_y
+                    if abs(dx) > abs(dy):
+                        self.start_grid_move(int(math.copysign(1, dx)), 0, player, other_npcs)
+                    else:
+                        self.start_grid_move(0, int(math.copysign(1, dy)), player, other_npcs)
 
         elif self.fsm_state == 'idle':
             self.grid_move_duration = self.config["movement_speed_duration"]
@@ -299,17 +337,17 @@ class NPC:
         
         elif self.fsm_state == 'choosing_move':
             directions = [(0, 1), (0, -1), (1, 0), (-1, 0)]
-            random.shuffle(directions)
+            self.maze.rng.shuffle(directions)
             moved = False
             for dx, dy in directions:
                 if self.start_grid_move(dx, dy, player, other_npcs):
                     self.fsm_state = 'moving'
-                    self.steps_to_take = random.randint(0, 2)
+                    self.steps_to_take = self.maze.rng.randint(0, 2)
                     moved = True
                     break 
             if not moved:
                 self.fsm_state = 'idle'
-                self.fsm_timer = random.uniform(0.5, 1.5)
+                self.fsm_timer = self.maze.rng.uniform(0.5, 1.5)
                 self.blocked_attempts +=1
         
         elif self.fsm_state == 'moving':
@@ -318,33 +356,15 @@ class NPC:
                     self.steps_to_take -= 1
                     if not self.start_grid_move(self.current_planned_dx, self.current_planned_dy, player, other_npcs):
                         self.fsm_state = 'idle'
-                        self.fsm_timer = random.uniform(1.0, 2.0)
+                        self.fsm_timer = self.maze.rng.uniform(1.0, 2.0)
                 else:
                     self.fsm_state = 'idle'
-                    self.fsm_timer = random.uniform(1.5, 4.0)
+                    self.fsm_timer = self.maze.rng.uniform(1.5, 4.0)
 
     def update_animation(self, dt):
-        anim_key = ""
         current_anim_frames = []
-        
-        if self.is_dead:
-            # --- UPDATED: Conditional death animation logic ---
-            if self.npc_type == 'demon':
-                # Demons use their attack animation for death.
-                anim_key = "attack"
-            else:
-                # Other NPCs (Orcs) use their dedicated death animation.
-                anim_key = "death"
-        elif self.is_attacking:
-            if self.npc_type == 'demon':
-                anim_key = "attack"
-            else:
-                anim_key = "attack_" + self.facing_direction
-        elif self.is_moving_animation_active:
-            if self.npc_type == 'demon':
-                anim_key = "fly"
-            else:
-                anim_key = "walk_" + self.facing_direction
+        anim_key = animation_key(self.npc_type, self.facing_direction, self.is_dead, self.is_attacking,
+                                 self.is_moving_animation_active)
         
         if anim_key and anim_key in self.animations:
             current_anim_frames = self.animations[anim_key]
@@ -365,7 +385,11 @@ class NPC:
         
         self.current_base_image = current_anim_frames[self.anim_frame_index]
 
-    def update(self, dt, player, other_npcs):
+    def update(self, dt, player, other_npcs, animate=True, interpolate=True):
+        """
+        Advances the NPC by dt seconds. At reduced levels of detail the animation is left
+        paused (animate=False) or the NPC jumps between cells at the end of each move (interpolate=False).
+        """
         if self.attack_cooldown > 0: self.attack_cooldown -= dt
         
         if self.is_dead:
@@ -375,16 +399,7 @@ class NPC:
 
         if self.is_attacking:
             self.attack_timer += dt
-            if self.attack_timer >= self.config["attack_duration"] / 2 and self.attack_timer - dt < self.config["attack_duration"] / 2:
-                dist_to_player = math.hypot(player.grid_x - self.grid_x, player.grid_y - self.grid_y)
-                if dist_to_player <= self.config["attack_range"]:
-                    player.take_damage(1)
-            
-            if self.attack_timer >= self.config["attack_duration"]:
-                self.is_attacking = False
-                self.fsm_state = 'chasing' 
-                self.attack_cooldown = self.config["attack_interval"]
-                self.anim_frame_index = 0
+            self._resolve_attack(dt, player)
             self.update_animation(dt)
             return
 
@@ -395,31 +410,66 @@ class NPC:
             self.move_timer += dt
             progress = self.move_timer / self.grid_move_duration
             if progress >= 1.0:
-                progress = 1.0
-                self.is_grid_moving = False
-                if not (self.fsm_state == 'moving' and self.steps_to_take > 0):
-                    self.is_moving_animation_active = False
-            
-            self.current_screen_x = self.move_start_screen_x + (self.target_screen_x - self.move_start_screen_x) * progress
-            self.current_screen_y = self.move_start_screen_y + (self.target_screen_y - self.move_start_screen_y) * progress
-            
-            if not self.is_grid_moving:
-                self.current_screen_x, self.current_screen_y = self.target_screen_x, self.target_screen_y
-                if self.npc_type == "demon":
-                    self.target_screen_x, self.target_screen_y = self._calculate_target_screen_pos(self.grid_x, self.grid_y)
-                    self.current_screen_x, self.current_screen_y = self.target_screen_x, self.target_screen_y
+                self._finish_grid_move()
+            elif interpolate:
+                self.current_screen_x = self.move_start_screen_x + (self.target_screen_x - self.move_start_screen_x) * progress
+                self.current_screen_y = self.move_start_screen_y + (self.target_screen_y - self.move_start_screen_y) * progress
+
+        if animate:
+            self.update_animation(dt)
 
-        self.update_animation(dt)
+    def _resolve_attack(self, dt, player):
+        """Deals the hit half-way through an attack and ends it once attack_timer (already advanced by dt) runs out."""
+        if self.attack_timer >= self.config["attack_duration"] / 2 and self.attack_timer - dt < self.config["attack_duration"] / 2:
+            dist_to_player = math.hypot(player.grid_x - self.grid_x, player.grid_y - self.grid_y)
+            if dist_to_player <= self.config["attack_range"]:
+                player.take_damage(1)
+        
+        if self.attack_timer >= self.config["attack_duration"]:
+            self.is_attacking = False
+            self.fsm_state = 'chasing' 
+            self.attack_cooldown = self.config["attack_interval"]
+            self.anim_frame_index = 0
 
-    def draw(self, surface, maze_offset_x, maze_offset_y):
+    def _finish_grid_move(self):
+        """Snaps the NPC onto its target tile at the end of a grid move."""
+        self.is_grid_moving = False
+        if not (self.fsm_state == 'moving' and self.steps_to_take > 0):
+            self.is_moving_animation_active = False
+        self.current_screen_x, self.current_screen_y = self.target_screen_x, self.target_screen_y
+        if self.npc_type == "demon":
+            self.target_screen_x, self.target_screen_y = self._calculate_target_screen_pos(self.grid_x, self.grid_y)
+            self.current_screen_x, self.current_screen_y = self.target_screen_x, self.target_screen_y
+
+    def save_render_state(self):
+        """Remembers the current position as the one render interpolation starts from. Call before each update."""
+        self.prev_screen_x, self.prev_screen_y = self.current_screen_x, self.current_screen_y
+
+    def get_render_pos(self, alpha=1.0):
+        """Returns the position to draw at, alpha of the way from the previous update's position to the current one."""
+        if alpha >= 1.0:
+            return self.current_screen_x, self.current_screen_y
+        return (self.prev_screen_x + (self.current_screen_x - self.prev_screen_x) * alpha,
+                self.prev_screen_y + (self.current_screen_y - self.prev_screen_y) * alpha)
+
+    def get_draw_state(self, maze_offset_x, maze_offset_y, alpha=1.0):
+        """Returns (screen rect tuple, image, flipped) for what draw() would blit, or None if nothing is drawn."""
+        if not self.current_base_image: return None
+        w, h = self.current_base_image.get_size()
+        render_x, render_y = self.get_render_pos(alpha)
+        draw_x = render_x + maze_offset_x - (w - self.target_npc_width)/2
+        draw_y = render_y + maze_offset_y - (h - self.target_npc_height)
+        return (tuple(pygame.Rect(draw_x, draw_y, w, h)), self.current_base_image, self.sprite_flipped)
+
+    def draw(self, surface, maze_offset_x, maze_offset_y, alpha=1.0):
         image_to_blit = self.current_base_image
         if not image_to_blit: return
 
-        if self.sprite_flipped:
-            image_to_blit = pygame.transform.flip(image_to_blit, True, False)
+        image_to_blit = get_sprite_variant(image_to_blit, flip=self.sprite_flipped)
             
         w, h = image_to_blit.get_size()
-        draw_x = self.current_screen_x + maze_offset_x - (w - self.target_npc_width)/2
-        draw_y = self.current_screen_y + maze_offset_y - (h - self.target_npc_height)
+        render_x, render_y = self.get_render_pos(alpha)
+        draw_x = render_x + maze_offset_x - (w - self.target_npc_width)/2
+        draw_y = render_y + maze_offset_y - (h - self.target_npc_height)
 
         surface.blit(image_to_blit, (draw_x, draw_y))
\ No newline at end of file
@@ -0,0 +1,265 @@
+# npc_batch.py
+from npc import NPC, NPC_CONFIGS, animation_key
+
+try:
+    import numpy as np
+except ImportError: # NumPy is optional; without it every NPC updates itself (see Maze.update_npcs)
+    np = None
+
+FSM_STATES = ('idle', 'choosing_move', 'moving', 'chasing', 'attacking', 'dead')
+FACING_DIRECTIONS = ('up', 'down', 'left', 'right')
+_FACING_DELTAS = ((0, -1), (0, 1), (-1, 0), (1, 0)) # Indexed like FACING_DIRECTIONS
+_FSM_IDLE = FSM_STATES.index('idle')
+
+# Per-NPC state kept in NumPy columns, by dtype
+FLOAT_FIELDS = ('move_timer', 'attack_cooldown', 'anim_timer', 'fsm_timer', 'attack_timer', 'death_timer',
+                'current_screen_x', 'current_screen_y', 'move_start_screen_x', 'move_start_screen_y',
+                'target_screen_x', 'target_screen_y', 'prev_screen_x', 'prev_screen_y', 'grid_move_duration')
+INT_FIELDS = ('grid_x', 'grid_y', 'anim_frame_index', 'steps_to_take', 'blocked_attempts')
+BOOL_FIELDS = ('is_grid_moving', 'is_moving_animation_active', 'is_attacking', 'is_dead')
+CODE_FIELDS = {'fsm_state': FSM_STATES, 'facing_direction': FACING_DIRECTIONS} # Strings stored as their index
+
+# Animation categories, in the priority order animation_key() checks them
+_ANIM_IDLE, _ANIM_DEATH, _ANIM_ATTACK, _ANIM_MOVE = range(4)
+_NO_IMAGE = -1
+
+class _Column:
+    """Data descriptor that stores an NPC attribute in its batch's column instead of the instance dict."""
+    def __init__(self, name):
+        self.name = name
+
+    def __get__(self, npc, owner=None):
+        if npc is None: return self
+        return npc._batch.columns[self.name].item(npc._slot)
+
+    def __set__(self, npc, value):
+        npc._batch.columns[self.name][npc._slot] = value
+
+class _CodeColumn(_Column):
+    """A string attribute with a fixed set of values, stored as the value's index."""
+    def __init__(self, name, values):
+        super().__init__(name)
+        self.values = values
+        self.codes = {value: i for i, value in enumerate(values)}
+
+    def __get__(self, npc, owner=None):
+        if npc is None: return self
+        return self.values[npc._batch.columns[self.name].item(npc._slot)]
+
+    def __set__(self, npc, value):
+        npc._batch.columns[self.name][npc._slot] = self.codes[value]
+
+class BatchedNPC(NPC):
+    """
+    An NPC whose per-frame state lives in the columns of an NPCBatch. It behaves exactly like
+    an NPC and can still update itself, but the batch normally advances it along with the others.
+    """
+    def __init__(self, initial_grid_x, initial_grid_y, maze, batch, npc_type="orc", load_assets=True):
+        self._batch = batch
+        self._slot = batch._allocate(self, npc_type)
+        super().__init__(initial_grid_x, initial_grid_y, maze, npc_type=npc_type, load_assets=load_assets)
+
+def _add_columns(cls):
+    for name in FLOAT_FIELDS + INT_FIELDS + BOOL_FIELDS:
+        setattr(cls, name, _Column(name))
+    for name, values in CODE_FIELDS.items():
+        setattr(cls, name, _CodeColumn(name, values))
+
+_add_columns(BatchedNPC)
+
+class NPCBatch:
+    """
+    Struct-of-arrays storage and update for a large number of NPCs, owned by a Maze.
+
+    update() runs the same logic as calling NPC.update on every NPC in order, but timers,
+    cooldowns, movement interpolation and animation frames are advanced in vectorised passes.
+    Only NPCs whose FSM has a decision to make (and attacks reaching their hit or end) drop into
+    per-NPC Python; idle NPCs that cannot see the player just count their timers down.
+    Requires NumPy.
+    """
+    def __init__(self, maze, capacity=64):
+        if np is None:
+            raise RuntimeError("NPCBatch requires NumPy.")
+        self.maze = maze
+        self.npcs = [] # Slot -> NPC, None for free slots
+        self._free_slots = []
+        self.columns = {}
+        self._type_codes = {npc_type: i for i, npc_type in enumerate(NPC_CONFIGS)}
+        self._registered_types = set()
+        # Frame counts of each (type, animation category, facing); filled in as types are first seen
+        self._frame_counts = np.zeros((len(self._type_codes), 4, len(FACING_DIRECTIONS)), dtype=np.int64)
+        self._grow(max(capacity, 1))
+
+    def _grow(self, capacity):
+        old_capacity = len(self.npcs)
+        specs = [(name, np.float64) for name in FLOAT_FIELDS] + [(name, np.int64) for name in INT_FIELDS]
+        specs += [(name, np.bool_) for name in BOOL_FIELDS] + [(name, np.int8) for name in CODE_FIELDS]
+        # Per-slot constants taken from the NPC's config, and bookkeeping
+        specs += [('active', np.bool_), ('type_code', np.int64), ('detection_range', np.float64),
+                  ('movement_speed_duration', np.float64), ('animation_playback_speed', np.float64),
+                  ('attack_duration', np.float64), ('death_duration', np.float64), ('shown_image', np.int64)]
+        for name, dtype in specs:
+            column = np.zeros(capacity, dtype=dtype)
+            if name in self.columns:
+                column[:old_capacity] = self.columns[name]
+            self.columns[name] = column
+        self.npcs.extend([None] * (capacity - old_capacity))
+        self._free_slots.extend(range(capacity - 1, old_capacity - 1, -1))
+
+    def _allocate(self, npc, npc_type):
+        if not self._free_slots:
+            self._grow(len(self.npcs) * 2)
+        slot = self._free_slots.pop()
+        config = NPC_CONFIGS[npc_type]
+        c = self.columns
+        for name in c:
+            c[name][slot] = 0
+        c['active'][slot] = True
+        c['type_code'][slot] = self._type_codes[npc_type]
+        c['detection_range'][slot] = config["detection_range"]
+        c['movement_speed_duration'][slot] = config["movement_speed_duration"]
+        c['animation_playback_speed'][slot] = config["animation_playback_speed"]
+        c['attack_duration'][slot] = config["attack_duration"]
+        c['death_duration'][slot] = config["death_duration"]
+        c['shown_image'][slot] = _NO_IMAGE
+        self.npcs[slot] = npc
+        return slot
+
+    def spawn(self, grid_x, grid_y, npc_type, load_assets=True):
+        """Creates a BatchedNPC stored in this batch."""
+        npc = BatchedNPC(grid_x, grid_y, self.maze, self, npc_type=npc_type, load_assets=load_assets)
+        self._register_type_frames(npc)
+        return npc
+
+    def release(self, npc):
+        """Frees the slot of an NPC that has been removed from the maze."""
+        self.columns['active'][npc._slot] = False
+        self.npcs[npc._slot] = None
+        self._free_slots.append(npc._slot)
+
+    def release_finished(self):
+        """Releases the NPCs whose death animation has finished and returns them as a set."""
+        c = self.columns
+        finished = {self.npcs[slot] for slot in
+                    np.flatnonzero(c['active'] & c['is_dead'] & (c['death_timer'] > c['death_duration']))}
+        for npc in finished:
+            self.release(npc)
+        return finished
+
+    def _register_type_frames(self, npc):
+        """Records the animation frame counts of an NPC's type, the first time the type is seen."""
+        type_code = self._type_codes[npc.npc_type]
+        if type_code in self._registered_types:
+            return
+        self._registered_types.add(type_code)
+        for category, flags in ((_ANIM_DEATH, (True, False, False)), (_ANIM_ATTACK, (False, True, False)),
+                                (_ANIM_MOVE, (False, False, True))):
+            for facing_code, facing in enumerate(FACING_DIRECTIONS):
+                frames = npc.animations.get(animation_key(npc.npc_type, facing, *flags))
+                self._frame_counts[type_code, category, facing_code] = len(frames) if frames else 0
+
+    def save_render_state(self):
+        """Vectorised NPC.save_render_state for every NPC in the batch."""
+        c = self.columns
+        c['prev_screen_x'][:] = c['current_screen_x']
+        c['prev_screen_y'][:] = c['current_screen_y']
+
+    def _detects_player(self, player):
+        """
+        NPC.check_player_detection for every slot (ignoring is_dead). The facing and range test is
+        vectorised; only the few NPCs that pass it look up their sight range.
+        """
+        c = self.columns
+        facing_dx, facing_dy = np.array(_FACING_DELTAS).T[:, c['facing_direction']]
+        dist_x, dist_y = player.grid_x - c['grid_x'], player.grid_y - c['grid_y']
+        in_row = (facing_dx != 0) & (dist_y == 0) & (np.copysign(1, dist_x) == facing_dx)
+        in_column = (facing_dy != 0) & (dist_x == 0) & (np.copysign(1, dist_y) == facing_dy)
+        detected = ((in_row & (np.abs(dist_x) <= c['detection_range'])) |
+                    (in_column & (np.abs(dist_y) <= c['detection_range']))) & c['active']
+        for slot in np.flatnonzero(detected):
+            npc = self.npcs[slot]
+            detected[slot] = 0 < abs(dist_x[slot] + dist_y[slot]) <= self.maze.get_sight_range(npc.grid_x, npc.grid_y, npc.facing_direction)
+        return detected
+
+    def update(self, dt, player):
+        """Advances every NPC in the batch by dt, equivalent to calling NPC.update on each in slot order."""
+        c = self.columns
+        npcs = self.npcs
+        active = c['active']
+        is_dead, is_attacking = c['is_dead'].copy(), c['is_attacking'].copy()
+        was_moving = c['is_grid_moving'].copy()
+
+        cooldown = c['attack_cooldown']
+        np.subtract(cooldown, dt, out=cooldown, where=active & (cooldown > 0))
+
+        dead = active & is_dead
+        c['death_timer'][dead] += dt
+
+        # Attacks: only those reaching their hit or their end need the per-NPC logic
+        attacking = active & ~is_dead & is_attacking
+        attack_timer = c['attack_timer']
+        attack_timer[attacking] += dt
+        half = c['attack_duration'] / 2
+        resolving = attacking & (((attack_timer >= half) & (attack_timer - dt < half)) | (attack_timer >= c['attack_duration']))
+        for slot in np.flatnonzero(resolving):
+            npcs[slot]._resolve_attack(dt, player)
+
+        # FSM: idle NPCs that can't see the player and aren't due to move just count down
+        thinking = active & ~is_dead & ~is_attacking & ~was_moving
+        fsm_timer = c['fsm_timer']
+        waiting = (thinking & (c['fsm_state'] == _FSM_IDLE) & ~self._detects_player(player) &
+                   (fsm_timer - dt > 0) & (c['blocked_attempts'] <= 2))
+        fsm_timer[waiting] -= dt
+        c['grid_move_duration'][waiting] = c['movement_speed_duration'][waiting]
+        for slot in np.flatnonzero(thinking & ~waiting):
+            npcs[slot].update_fsm(dt, player, self.maze.npcs)
+
+        # Grid movement interpolation, including moves the FSM just started
+        moving = active & ~is_dead & ~is_attacking & c['is_grid_moving']
+        move_timer = c['move_timer']
+        move_timer[moving] += dt
+        progress = np.zeros_like(move_timer)
+        np.divide(move_timer, c['grid_move_duration'], out=progress, where=moving)
+        arriving = moving & (progress >= 1.0)
+        moving &= ~arriving
+        for axis in ('x', 'y'):
+            start, target = c['move_start_screen_' + axis], c['target_screen_' + axis]
+            current = c['current_screen_' + axis]
+            current[moving] = start[moving] + (target[moving] - start[moving]) * progress[moving]
+        for slot in np.flatnonzero(arriving):
+            npcs[slot]._finish_grid_move()
+
+        self._update_animations(dt, active)
+
+    def _update_animations(self, dt, active):
+        """Vectorised NPC.update_animation for the given slots."""
+        c = self.columns
+        category = np.select([c['is_dead'], c['is_attacking'], c['is_moving_animation_active']],
+                             [_ANIM_DEATH, _ANIM_ATTACK, _ANIM_MOVE], _ANIM_IDLE)
+        facing, type_code = c['facing_direction'].astype(np.int64), c['type_code']
+        frame_count = self._frame_counts[type_code, category, facing]
+        animated = active & (frame_count > 0)
+
+        anim_timer, speed = c['anim_timer'], c['animation_playback_speed']
+        anim_timer[animated] += dt
+        stepping = animated & (anim_timer >= speed)
+        anim_timer[stepping] -= speed[stepping]
+        frame = c['anim_frame_index']
+        last_frame = frame_count - 1
+        holding = stepping & (c['is_dead'] | c['is_attacking']) & (frame >= last_frame) # Death and attack don't loop
+        looping = stepping & ~holding
+        frame[holding] = last_frame[holding]
+        frame[looping] = (frame[looping] + 1) % frame_count[looping]
+
+        # Only touch the NPC objects whose image actually changes
+        image_code = np.where(animated, ((type_code * 4 + category) * 4 + facing) * 256 + frame, _NO_IMAGE - 1)
+        changed = active & (image_code != c['shown_image'])
+        c['shown_image'][changed] = image_code[changed]
+        for slot in np.flatnonzero(changed):
+            npc = self.npcs[slot]
+            if animated[slot]:
+                npc.current_base_image = npc.animations[animation_key(
+                    npc.npc_type, npc.facing_direction, npc.is_dead, npc.is_attacking, npc.is_moving_animation_active)][frame[slot]]
+            else:
+                npc._update_idle_image_and_flip_status()
+                npc.current_base_image = npc.idle_image_base
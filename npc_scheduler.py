@@ -0,0 +1,182 @@
+# npc_scheduler.py
+import heapq
+from bisect import insort
+from npc import LOD_FULL, LOD_MID, LOD_FAR
+
+MIN_SLEEP_STEPS = 2 # NPCs due to act sooner than this stay awake
+LOD_STEP_INTERVAL_KEYS = {LOD_MID: "lod_mid_step_interval", LOD_FAR: "lod_far_step_interval"} # NPC_CONFIGS entries
+
+class NPCScheduler:
+    """
+    Updates a maze's (unbatched) NPCs each step, skipping the ones that are asleep.
+
+    An idle NPC further than wake_range cells from the player does nothing but count down its
+    fsm_timer: it cannot see the player, and nothing it does depends on anyone else. Such
+    NPCs are put to sleep in a heap keyed by the step in which their timer runs out, and woken
+    in that step, or earlier once the player comes within wake_range. On waking they catch up
+    on the timer countdown they slept through, step by step, so they behave exactly as if
+    they had been updated every step. While an NPC sleeps its fsm_timer and attack_cooldown
+    are stale.
+
+    With lod, awake NPCs off screen are also simulated at a lower level of detail, by how far
+    they are from the edge of the screen (see the lod_* entries of NPC_CONFIGS): LOD_MID NPCs
+    update every few steps with the time that has passed and don't animate, LOD_FAR ones update
+    less often still and don't slide between cells either. Their tier is looked at again when
+    their next update is due; one that comes back into LOD_FULL first catches up on the time it
+    hasn't been updated for. Chasing, attacking and dying NPCs are always in LOD_FULL.
+
+    Each step thus costs time for the awake NPCs (moving, attacking, dying, chasing or near
+    the player) plus those waking up, not for every NPC.
+    """
+    def __init__(self, maze, npcs, wake_range, lod=True):
+        self.maze = maze
+        self.wake_range = wake_range
+        self.lod = lod
+        self.steps = 0 # Steps completed
+        self.dt = None
+        self.active = list(npcs) # Awake NPCs, in spawn order (the order they have always updated in)
+        self.tier_counts = [len(self.active), 0, 0] # Awake NPCs in each LOD tier in the last step
+        self._order = {npc: i for i, npc in enumerate(npcs)}
+        self._asleep = {} # NPC -> last step it was updated in
+        self._wake_heap = [] # (step it is due in, spawn order, step it fell asleep in, NPC)
+        self._player_cell = None
+        self._view = None # Maze.get_view_cells() of the player's cell, with lod
+
+    @property
+    def sleeping_count(self):
+        return len(self._asleep)
+
+    @property
+    def lod_counts(self):
+        """The number of NPCs in each LOD tier, and asleep, as of the last step."""
+        full, mid, far = self.tier_counts
+        return {'full': full, 'mid': mid, 'far': far, 'asleep': len(self._asleep)}
+
+    def update(self, dt, player, npcs):
+        """Runs one step of the awake NPCs' updates. Returns the set of NPCs whose death animation has finished."""
+        if dt != self.dt:
+            # Sleep lengths were counted in steps of the old dt
+            self.wake_all()
+            self.dt = dt
+        step = self.steps + 1
+
+        player_cell = (player.grid_x, player.grid_y)
+        if player_cell != self._player_cell:
+            self._player_cell = player_cell
+            if self.lod:
+                self._view = self.maze.get_view_cells(*player_cell)
+            self._wake_near(*player_cell)
+        heap = self._wake_heap
+        while heap and heap[0][0] <= step:
+            _, _, slept_since, npc = heapq.heappop(heap)
+            if self._asleep.get(npc) == slept_since: # Entries of NPCs woken early are stale
+                self._wake(npc)
+
+        finished = set()
+        still_active = []
+        tier_counts = [0, 0, 0]
+        for npc in self.active:
+            tier = npc.lod_tier
+            if tier != LOD_FULL and npc.lod_pending_steps + 1 < npc.config[LOD_STEP_INTERVAL_KEYS[tier]]:
+                # Not due yet; by then it can't have come close enough to need a finer tier
+                npc.lod_pending_time += dt
+                npc.lod_pending_steps += 1
+                tier_counts[tier] += 1
+                still_active.append(npc)
+                continue
+            if self.lod:
+                tier = npc.lod_tier = self._lod_tier(npc)
+            tier_counts[tier] += 1
+            # Time skipped at a lower tier is caught up on at once (it is 0.0 otherwise)
+            step_dt = dt + npc.lod_pending_time
+            npc.lod_pending_time, npc.lod_pending_steps = 0.0, 0
+            npc.update(step_dt, player, npcs, animate=tier == LOD_FULL, interpolate=tier != LOD_FAR)
+
+            if npc.is_dead:
+                if npc.death_timer > npc.config["death_duration"]:
+                    finished.add(npc)
+                    continue
+            elif self._can_sleep(npc, player):
+                due = self._steps_until_due(npc.fsm_timer, dt)
+                if due >= MIN_SLEEP_STEPS:
+                    self._asleep[npc] = step
+                    heapq.heappush(heap, (step + due, self._order[npc], step, npc))
+                    continue
+            still_active.append(npc)
+        self.active = still_active
+        self.tier_counts = tier_counts
+        self.steps = step
+        return finished
+
+    def wake(self, npc):
+        """Wakes an NPC if it is asleep."""
+        if npc in self._asleep:
+            self._wake(npc)
+
+    def wake_all(self):
+        for npc in list(self._asleep):
+            self._wake(npc)
+        self._wake_heap = []
+
+    def _in_view(self, npc):
+        col_start, col_end, row_start, row_end = self._view
+        return col_start <= npc.grid_x < col_end and row_start <= npc.grid_y < row_end
+
+    def _lod_tier(self, npc):
+        if npc.fsm_state in ('chasing', 'attacking') or npc.is_dead:
+            return LOD_FULL
+        # Cells between the NPC and the view box (0 inside it)
+        col_start, col_end, row_start, row_end = self._view
+        distance = max(col_start - npc.grid_x, npc.grid_x - col_end + 1, row_start - npc.grid_y, npc.grid_y - row_end + 1, 0)
+        if distance <= npc.config["lod_full_range"]:
+            return LOD_FULL
+        return LOD_MID if distance <= npc.config["lod_mid_range"] else LOD_FAR
+
+    def _shows_walk_frames(self, npc):
+        """
+        Whether an idle NPC is visibly walking on the spot, as NPCs that gave up on a move are.
+        Its frames don't advance while it sleeps, so it is kept awake.
+        """
+        return npc.is_moving_animation_active and npc.animations and (not self.lod or self._in_view(npc))
+
+    def _can_sleep(self, npc, player):
+        return (npc.fsm_state == 'idle' and not npc.is_grid_moving and npc.blocked_attempts <= 2
+                and max(abs(npc.grid_x - player.grid_x), abs(npc.grid_y - player.grid_y)) > self.wake_range
+                and not self._shows_walk_frames(npc))
+
+    @staticmethod
+    def _steps_until_due(fsm_timer, dt):
+        """The number of steps until update_fsm, counting the timer down by dt each step, finds it run out."""
+        steps = 0
+        while fsm_timer > 0:
+            fsm_timer -= dt
+            steps += 1
+        return steps
+
+    def _wake(self, npc):
+        """Catches an NPC up on the steps it slept through (none of the current one) and makes it active again."""
+        missed = self.steps - self._asleep.pop(npc)
+        dt = self.dt
+        for _ in range(missed):
+            # What NPC.update did to an idle NPC each step
+            if npc.attack_cooldown > 0: npc.attack_cooldown -= dt
+            npc.fsm_timer -= dt
+        npc.lod_tier = LOD_FULL # Its tier is looked at again on its first step
+        insort(self.active, npc, key=self._order.__getitem__)
+
+    def _wake_near(self, x, y):
+        """Wakes the sleeping NPCs within wake_range cells of (x, y), and those now on screen walking on the spot."""
+        maze, reach = self.maze, self.wake_range
+        col_start, col_end, row_start, row_end = x - reach, x + reach + 1, y - reach, y + reach + 1
+        if self._view:
+            view_col_start, view_col_end, view_row_start, view_row_end = self._view
+            col_start, col_end = min(col_start, view_col_start), max(col_end, view_col_end)
+            row_start, row_end = min(row_start, view_row_start), max(row_end, view_row_end)
+        for cell_y in range(max(0, row_start), min(maze.height, row_end)):
+            row = maze.occupancy[cell_y]
+            for cell_x in range(max(0, col_start), min(maze.max_row_length, col_end)):
+                occupant = row[cell_x]
+                if occupant is None or occupant not in self._asleep:
+                    continue
+                if max(abs(cell_x - x), abs(cell_y - y)) <= reach or self._shows_walk_frames(occupant):
+                    self._wake(occupant)
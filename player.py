@@ -2,6 +2,7 @@
 import pygame
 import os 
 import math
+from sprite_cache import load_frames
 
 # Constants
 GRID_SIZE = 80
@@ -24,11 +25,53 @@ ATTACK_FRAME_TO_HIT = 4 # The frame in the attack animation when damage is appli
 ATTACK_DURATION = 8 * ATTACK_ANIMATION_SPEED 
 DEATH_SEQUENCE_DURATION = 2.0 # Time from death until Game Over screen appears
 
+# Sprite sheets: (action, filename, frame count, direction)
+PLAYER_ASSET_PATH = './assets/Player/'
+PLAYER_FRAME_WIDTH = 96
+PLAYER_FRAME_HEIGHT = 80
+PLAYER_SPRITE_SHEETS = [
+    ("idle", "idle_down.png", 8, "down"), ("idle", "idle_up.png", 8, "up"),
+    ("idle", "idle_left.png", 8, "left"), ("idle", "idle_right.png", 8, "right"),
+    ("run", "run_down.png", 4, "down"), ("run", "run_up.png", 4, "up"),
+    ("run", "run_left.png", 4, "left"), ("run", "run_right.png", 4, "right"),
+    ("attack", "attack1_left.png", 8, "left"), ("attack", "attack1_right.png", 8, "right"),
+    ("attack", "attack1_up.png", 8, "up"), ("attack", "attack1_down.png", 8, "down"),
+]
+# Frames per (action, direction). Attack hits are timed by frame, so players without sprites still count them.
+PLAYER_FRAME_COUNTS = {(action, direction): frame_count for action, _, frame_count, direction in PLAYER_SPRITE_SHEETS}
+
+# Shared by all Player instances, filled in by load_sounds()
+PLAYER_HURT_SOUND = None
+PLAYER_ATTACK_SOUND = None
+
+def load_sounds():
+    """Loads the player sound effects once. Needs the mixer to be initialised."""
+    global PLAYER_HURT_SOUND, PLAYER_ATTACK_SOUND
+    try:
+        PLAYER_HURT_SOUND = pygame.mixer.Sound('./assets/hurt.mp3')
+        PLAYER_ATTACK_SOUND = pygame.mixer.Sound('./assets/swing_sword.mp3')
+    except pygame.error as e:
+        print(f"Warning: Could not load one or more player sounds: {e}")
+    return PLAYER_HURT_SOUND, PLAYER_ATTACK_SOUND
+
+def _sprite_sheet_path(base_path, action, filename):
+    filepath = os.path.join(base_path, action, filename)
+    if not os.path.exists(filepath):
+        filepath = os.path.join(base_path, filename)
+    return filepath
+
+def preload_sprites():
+    """Decodes every player sprite sheet into the shared sprite cache."""
+    for action, filename, frame_count, _ in PLAYER_SPRITE_SHEETS:
+        frame_rects = [(i * PLAYER_FRAME_WIDTH, 0, PLAYER_FRAME_WIDTH, PLAYER_FRAME_HEIGHT) for i in range(frame_count)]
+        load_frames(_sprite_sheet_path(PLAYER_ASSET_PATH, action, filename), frame_rects, (TARGET_PLAYER_WIDTH, TARGET_PLAYER_HEIGHT))
+
 class Player:
-    def __init__(self, initial_grid_x, initial_grid_y, maze):
+    def __init__(self, initial_grid_x, initial_grid_y, maze, load_assets=True):
         self.grid_x = initial_grid_x
         self.grid_y = initial_grid_y
         self.maze = maze
+        self.load_assets = load_assets # False for headless simulations: no sprites, no images to draw
 
         self.max_health = 3
         self.health = self.max_health
@@ -48,7 +91,8 @@ class Player:
         self.current_image = None
         self.anim_frame_index = 0
         self.anim_timer = 0.0
-        self.load_sprites() 
+        if load_assets:
+            self.load_sprites() 
 
         self.facing_direction = "down"  
         self.current_action = "idle"    
@@ -67,40 +111,27 @@ class Player:
         self.run_timer = 0.0
         self.RUN_TRIGGER_TIME = 0.15 
 
-        # --- Load player sound effects ---
-        self.hurt_sound = None
-        self.attack_sound = None
-        try:
-            self.hurt_sound = pygame.mixer.Sound('./assets/hurt.mp3')
-            self.attack_sound = pygame.mixer.Sound('./assets/swing_sword.mp3')
-        except pygame.error as e:
-            print(f"Warning: Could not load one or more player sounds: {e}")
-
         self.target_screen_x, self.target_screen_y = self._calculate_target_screen_pos(self.grid_x, self.grid_y)
         self.current_screen_x = self.target_screen_x
         self.current_screen_y = self.target_screen_y
+        self.save_render_state()
         
         self._update_current_image() 
 
+        if self.maze:
+            self.maze.place_entity(self)
 
-    def _load_sprite_sheet(self, base_path, action, filename, frame_count, orig_frame_width, orig_frame_height, scale_to_width, scale_to_height, direction=None):
-        filepath = os.path.join(base_path, action, filename)
-        if not os.path.exists(filepath):
-            filepath = os.path.join(base_path, filename)
 
-        frames = []
+    def _load_sprite_sheet(self, base_path, action, filename, frame_count, orig_frame_width, orig_frame_height, scale_to_width, scale_to_height, direction=None):
+        filepath = _sprite_sheet_path(base_path, action, filename)
         try:
-            sheet = pygame.image.load(filepath).convert_alpha()
-            for i in range(frame_count):
-                frame_rect = pygame.Rect(i * orig_frame_width, 0, orig_frame_width, orig_frame_height)
-                frame = sheet.subsurface(frame_rect)
-                scaled_frame = pygame.transform.scale(frame, (scale_to_width, scale_to_height))
-                frames.append(scaled_frame)
+            frame_rects = [(i * orig_frame_width, 0, orig_frame_width, orig_frame_height) for i in range(frame_count)]
+            frames = load_frames(filepath, frame_rects, (scale_to_width, scale_to_height))
         except Exception as e: 
             print(f"ERROR loading sprite: {filepath} - {e}. Appending fallback surface.")
             fallback_surface = pygame.Surface((scale_to_width, scale_to_height), pygame.SRCALPHA)
             fallback_surface.fill((255, 0, 255, 180)) 
-            frames.append(fallback_surface)
+            frames = (fallback_surface,)
         
         if direction:
             self.animations[action][direction] = frames
@@ -108,29 +139,9 @@ class Player:
             self.animations[action] = frames
 
     def load_sprites(self):
-        base_asset_path = './assets/Player/' 
-        common_frame_count = 8
-        run_frame_count = 4 
-        common_orig_w = 96 
-        common_orig_h = 80
-
-        # Load Idle Sprites
-        self._load_sprite_sheet(base_asset_path, "idle", "idle_down.png", common_frame_count, common_orig_w, common_orig_h, TARGET_PLAYER_WIDTH, TARGET_PLAYER_HEIGHT, direction="down")
-        self._load_sprite_sheet(base_asset_path, "idle", "idle_up.png", common_frame_count, common_orig_w, common_orig_h, TARGET_PLAYER_WIDTH, TARGET_PLAYER_HEIGHT, direction="up") 
-        self._load_sprite_sheet(base_asset_path, "idle", "idle_left.png", common_frame_count, common_orig_w, common_orig_h, TARGET_PLAYER_WIDTH, TARGET_PLAYER_HEIGHT, direction="left") 
-        self._load_sprite_sheet(base_asset_path, "idle", "idle_right.png", common_frame_count, common_orig_w, common_orig_h, TARGET_PLAYER_WIDTH, TARGET_PLAYER_HEIGHT, direction="right")
-        
-        # Load Run Sprites
-        self._load_sprite_sheet(base_asset_path, "run", "run_down.png", run_frame_count, common_orig_w, common_orig_h, TARGET_PLAYER_WIDTH, TARGET_PLAYER_HEIGHT, direction="down")
-        self._load_sprite_sheet(base_asset_path, "run", "run_up.png", run_frame_count, common_orig_w, common_orig_h, TARGET_PLAYER_WIDTH, TARGET_PLAYER_HEIGHT, direction="up")
-        self._load_sprite_sheet(base_asset_path, "run", "run_left.png", run_frame_count, common_orig_w, common_orig_h, TARGET_PLAYER_WIDTH, TARGET_PLAYER_HEIGHT, direction="left")
-        self._load_sprite_sheet(base_asset_path, "run", "run_right.png", run_frame_count, common_orig_w, common_orig_h, TARGET_PLAYER_WIDTH, TARGET_PLAYER_HEIGHT, direction="right")
-
-        # Load Attack Sprites
-        self._load_sprite_sheet(base_asset_path, "attack", "attack1_left.png", common_frame_count, common_orig_w, common_orig_h, TARGET_PLAYER_WIDTH, TARGET_PLAYER_HEIGHT, direction="left")
-        self._load_sprite_sheet(base_asset_path, "attack", "attack1_right.png", common_frame_count, common_orig_w, common_orig_h, TARGET_PLAYER_WIDTH, TARGET_PLAYER_HEIGHT, direction="right") 
-        self._load_sprite_sheet(base_asset_path, "attack", "attack1_up.png", common_frame_count, common_orig_w, common_orig_h, TARGET_PLAYER_WIDTH, TARGET_PLAYER_HEIGHT, direction="up")       
-        self._load_sprite_sheet(base_asset_path, "attack", "attack1_down.png", common_frame_count, common_orig_w, common_orig_h, TARGET_PLAYER_WIDTH, TARGET_PLAYER_HEIGHT, direction="down")  
+        for action, filename, frame_count, direction in PLAYER_SPRITE_SHEETS:
+            self._load_sprite_sheet(PLAYER_ASSET_PATH, action, filename, frame_count, PLAYER_FRAME_WIDTH, PLAYER_FRAME_HEIGHT,
+                                    TARGET_PLAYER_WIDTH, TARGET_PLAYER_HEIGHT, direction=direction)
 
     def _calculate_target_screen_pos(self, grid_x, grid_y):
         base_x = grid_x * GRID_SIZE
@@ -140,6 +151,12 @@ class Player:
         screen_y = feet_anchor_y_on_grid_surface - TARGET_PLAYER_HEIGHT 
         return screen_x, screen_y+110
 
+    def get_focus_point(self):
+        """Maze coordinates of the centre of the tile under the player, following the move interpolation."""
+        feet_x = self.current_screen_x + TARGET_PLAYER_WIDTH / 2.0
+        feet_y = self.current_screen_y - 110 + TARGET_PLAYER_HEIGHT
+        return feet_x, feet_y - STAGGER_HEIGHT_PER_ROW / 2.0
+
     def _direction_str_to_dxdy(self, direction_str):
         if direction_str == "up": return 0, -1
         if direction_str == "down": return 0, 1
@@ -187,11 +204,13 @@ class Player:
         next_grid_y = self.grid_y + dy
         if not self.maze.is_walkable(next_grid_x, next_grid_y):
             return False
-        for npc in npcs: 
-            if npc.grid_x == next_grid_x and npc.grid_y == next_grid_y and not npc.is_dead:
-                return False
+        # Dead NPCs leave the occupancy grid, so any occupant blocks the move
+        if self.maze.get_occupant(next_grid_x, next_grid_y):
+            return False
+        old_grid_x, old_grid_y = self.grid_x, self.grid_y
         self.grid_x = next_grid_x
         self.grid_y = next_grid_y
+        self.maze.move_entity(self, old_grid_x, old_grid_y)
         
         if dx > 0: self.facing_direction = "right"
         elif dx < 0: self.facing_direction = "left"
@@ -213,8 +232,8 @@ class Player:
             return
         
         # --- NEW: Play the attack sound ---
-        if self.attack_sound:
-            self.attack_sound.play()
+        if PLAYER_ATTACK_SOUND:
+            PLAYER_ATTACK_SOUND.play()
 
         self.is_attacking = True
         self.current_action = "attack"
@@ -227,8 +246,8 @@ class Player:
         if self.is_dead: return
         self.health -= amount
 
-        if self.hurt_sound:
-            self.hurt_sound.play()
+        if PLAYER_HURT_SOUND:
+            PLAYER_HURT_SOUND.play()
 
         if self.health <= 0:
             self.health = 0
@@ -241,15 +260,12 @@ class Player:
     def check_attack_hit(self, npcs):
         if self.has_dealt_damage_this_attack: return
 
-        if self.anim_frame_index == ATTACK_FRAME_TO_HIT:
+        if self.anim_frame_index == ATTACK_FRAME_TO_HIT and self.maze:
             dx, dy = self._direction_str_to_dxdy(self.facing_direction)
-            target_x, target_y = self.grid_x + dx, self.grid_y + dy
-
-            for npc in npcs:
-                if npc.grid_x == target_x and npc.grid_y == target_y and not npc.is_dead:
-                    npc.take_damage(1)
-                    self.has_dealt_damage_this_attack = True
-                    break
+            target = self.maze.get_occupant(self.grid_x + dx, self.grid_y + dy)
+            if target is not None and target is not self and not target.is_dead:
+                target.take_damage(1)
+                self.has_dealt_damage_this_attack = True
 
     def _update_grid_move(self, dt): 
         if not self.is_grid_moving: return
@@ -272,8 +288,12 @@ class Player:
 
     def _update_animation_frames(self, dt):
         frames_list = self.animations.get(self.current_action, {}).get(self.facing_direction, [])
+        if self.load_assets:
+            frame_count = len(frames_list)
+        else:
+            frame_count = PLAYER_FRAME_COUNTS.get((self.current_action, self.facing_direction), 0)
         
-        if not frames_list: return
+        if not frame_count: return
         
         anim_speed = DEFAULT_ANIMATION_SPEED
         if self.current_action == "attack":
@@ -283,16 +303,16 @@ class Player:
         if self.anim_timer >= anim_speed:
             self.anim_timer -= anim_speed
             if self.current_action == "attack":
-                if self.anim_frame_index < len(frames_list) - 1:
+                if self.anim_frame_index < frame_count - 1:
                     self.anim_frame_index += 1
             else: 
-                self.anim_frame_index = (self.anim_frame_index + 1) % len(frames_list)
+                self.anim_frame_index = (self.anim_frame_index + 1) % frame_count
         
         if self.anim_frame_index < len(frames_list):
             self.current_image = frames_list[self.anim_frame_index]
 
     def _update_current_image(self):
-        if self.current_image is None:
+        if self.current_image is None and self.load_assets:
             active_frames = self.animations.get(self.current_action, {}).get(self.facing_direction, [])
             if active_frames:
                 self.current_image = active_frames[0]
@@ -322,11 +342,32 @@ class Player:
         self._update_animation_frames(dt)
         self._update_current_image()
 
-    def draw(self, surface, maze_offset_x, maze_offset_y):
+    def save_render_state(self):
+        """Remembers the current position as the one render interpolation starts from. Call before each update."""
+        self.prev_screen_x, self.prev_screen_y = self.current_screen_x, self.current_screen_y
+
+    def get_render_pos(self, alpha=1.0):
+        """Returns the position to draw at, alpha of the way from the previous update's position to the current one."""
+        if alpha >= 1.0:
+            return self.current_screen_x, self.current_screen_y
+        return (self.prev_screen_x + (self.current_screen_x - self.prev_screen_x) * alpha,
+                self.prev_screen_y + (self.current_screen_y - self.prev_screen_y) * alpha)
+
+    def get_draw_state(self, maze_offset_x, maze_offset_y, alpha=1.0):
+        """Returns (screen rect tuple, image, flipped) for what draw() would blit, or None if nothing is drawn."""
+        if self.is_dead or not self.current_image:
+            return None
+        render_x, render_y = self.get_render_pos(alpha)
+        draw_x = render_x + maze_offset_x
+        draw_y = render_y + maze_offset_y
+        return (tuple(self.current_image.get_rect(topleft=(draw_x, draw_y))), self.current_image, False)
+
+    def draw(self, surface, maze_offset_x, maze_offset_y, alpha=1.0):
         if self.is_dead:
             return
             
         if self.current_image:
-            draw_x = self.current_screen_x + maze_offset_x
-            draw_y = self.current_screen_y + maze_offset_y
+            render_x, render_y = self.get_render_pos(alpha)
+            draw_x = render_x + maze_offset_x
+            draw_y = render_y + maze_offset_y
             surface.blit(self.current_image, (draw_x, draw_y))
\ No newline at end of file
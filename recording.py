@@ -0,0 +1,68 @@
+# recording.py
+import struct
+import pygame
+
+# The keys a recording keeps; other keys do nothing in gameplay. An event is one byte:
+# the key's index here, plus EVENT_PRESSED for a key press.
+RECORDED_KEYS = (pygame.K_UP, pygame.K_DOWN, pygame.K_LEFT, pygame.K_RIGHT, pygame.K_SPACE)
+EVENT_PRESSED = 0x80
+
+# File layout: the header, then one tick record per simulation step, each followed by its events.
+RECORDING_MAGIC = b'DWRC'
+RECORDING_VERSION = 1
+HEADER = struct.Struct('<4sBHQdI') # magic, version, level number, maze seed, seconds per tick, tick count
+TICK = struct.Struct('<BI') # event count, state hash after the step
+
+def encode_event(key, pressed):
+    """Returns the event byte of a key press or release, or None for keys that are not recorded."""
+    if key not in RECORDED_KEYS:
+        return None
+    return RECORDED_KEYS.index(key) | (EVENT_PRESSED if pressed else 0)
+
+def decode_event(event):
+    """Returns the (key, pressed) of an event byte."""
+    return RECORDED_KEYS[event & ~EVENT_PRESSED], bool(event & EVENT_PRESSED)
+
+class InputRecording:
+    """
+    The input of one session of a level: the events given before every simulation step, and the
+    state hash after it (see Simulation.state_hash). With the level's maze seed that is all a replay needs.
+    """
+    def __init__(self, level_number, seed, dt):
+        self.level_number = level_number
+        self.seed = seed
+        self.dt = dt
+        self.ticks = [] # (event bytes, state hash) per step
+
+    def add_tick(self, events, state_hash):
+        self.ticks.append((bytes(events), state_hash))
+
+    def to_bytes(self):
+        parts = [HEADER.pack(RECORDING_MAGIC, RECORDING_VERSION, self.level_number, self.seed, self.dt, len(self.ticks))]
+        for events, state_hash in self.ticks:
+            parts.append(TICK.pack(len(events), state_hash))
+            parts.append(events)
+        return b''.join(parts)
+
+    @classmethod
+    def from_bytes(cls, data):
+        magic, version, level_number, seed, dt, tick_count = HEADER.unpack_from(data)
+        if magic != RECORDING_MAGIC or version != RECORDING_VERSION:
+            raise ValueError("Not a recording of this game version.")
+        recording = cls(level_number, seed, dt)
+        offset = HEADER.size
+        for _ in range(tick_count):
+            event_count, state_hash = TICK.unpack_from(data, offset)
+            offset += TICK.size
+            recording.ticks.append((data[offset:offset + event_count], state_hash))
+            offset += event_count
+        return recording
+
+    def save(self, path):
+        with open(path, 'wb') as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            return cls.from_bytes(f.read())
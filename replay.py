@@ -0,0 +1,58 @@
+# replay.py
+import argparse
+import contextlib
+import io
+import sys
+import time
+from level_controller import LevelController
+from recording import InputRecording, decode_event
+from simulation import Simulation
+
+def replay(recording, level_controller=None, check=True):
+    """
+    Replays a recording headlessly, as fast as it runs. With check, stops at the first tick whose
+    state hash differs from the recorded one.
+    Returns (simulation, index of the first diverging tick or None).
+    """
+    sim = Simulation.from_level(recording.level_number, level_controller, seed=recording.seed)
+    for tick, (events, state_hash) in enumerate(recording.ticks):
+        for event in events:
+            key, pressed = decode_event(event)
+            if pressed:
+                sim.press(key)
+            else:
+                sim.release(key)
+        sim.step(recording.dt)
+        if check and sim.state_hash() != state_hash:
+            return sim, tick
+    return sim, None
+
+def main():
+    parser = argparse.ArgumentParser(description="Replays recorded sessions (see main.py --record) headlessly and checks their state hashes.")
+    parser.add_argument("recordings", nargs="+", help="recording files to replay")
+    parser.add_argument("--repeat", type=int, default=1, help="replays of each recording, for timing (default: 1)")
+    parser.add_argument("--no-check", action="store_true", help="do not compare state hashes, only time the replay")
+    parser.add_argument("--verbose", action="store_true", help="show the game's own console output")
+    args = parser.parse_args()
+
+    level_controller = LevelController()
+    diverged = False
+    for path in args.recordings:
+        recording = InputRecording.load(path)
+        output = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+        start = time.perf_counter()
+        with output:
+            for _ in range(args.repeat):
+                sim, diverging_tick = replay(recording, level_controller, check=not args.no_check)
+        elapsed = (time.perf_counter() - start) / args.repeat
+
+        outcome = "won" if sim.won else "lost" if sim.lost else "unfinished"
+        print(f"{path}: level {recording.level_number}, {sim.ticks} ticks, {outcome}, "
+              f"{elapsed * 1000.0:.1f} ms ({sim.ticks / elapsed:.0f} ticks/s)")
+        if diverging_tick is not None:
+            diverged = True
+            print(f"  state diverges from the recording at tick {diverging_tick} ({diverging_tick * recording.dt:.2f} s)")
+    sys.exit(1 if diverged else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+# simulation.py
+import zlib
+from array import array
+from level_controller import LevelController, PLAYER_START_POS
+from player import Player, DEATH_SEQUENCE_DURATION
+from npc_batch import FSM_STATES, FACING_DIRECTIONS
+from recording import InputRecording, encode_event
+
+SIMULATION_STEP = 1 / 60.0 # Seconds of game time per update
+DEFAULT_MAX_TICKS = 60 * 60 * 10 # Ten minutes of game time
+
+class Simulation:
+    """
+    A level's game logic on its own: the maze, its NPCs and the player, advanced in fixed steps.
+    It needs no window, audio or frame clock, so besides running under GameplayState it can
+    fast-forward levels for tools such as difficulty tuning and regression tests.
+
+    Input goes through press()/release(), the same key handling the game uses. Made with
+    from_level(), the player and NPCs skip loading sprites, which keeps resets cheap.
+    All randomness comes from the maze's RNG, so the maze seed and the input replay a session;
+    start_recording() records them (see replay.py).
+    """
+    def __init__(self, maze, load_assets=True):
+        self.maze = maze
+        self.player = Player(*PLAYER_START_POS, maze, load_assets=load_assets)
+        self.ticks = 0
+        self.time = 0.0
+        self.won = False
+        self.lost = False
+        self.recording = None
+        self._tick_events = bytearray() # Recorded events given since the last step
+
+    @classmethod
+    def from_level(cls, level_number, level_controller=None, seed=None, load_assets=False):
+        """
+        Builds a simulation of a level from map.txt (or the given LevelController).
+        seed seeds the maze's RNG, so NPC spawns and decisions are reproducible.
+        """
+        if level_controller is None:
+            level_controller = LevelController()
+        maze = level_controller.get_level(level_number, load_assets=load_assets, seed=seed)
+        if maze is None:
+            raise ValueError(f"Level {level_number} does not exist.")
+        return cls(maze, load_assets=load_assets)
+
+    @property
+    def done(self):
+        return self.won or self.lost
+
+    def start_recording(self):
+        """Starts recording the input and state hashes of every step into self.recording."""
+        if self.ticks:
+            raise ValueError("A recording has to start before the first step.")
+        self.recording = InputRecording(self.maze.level_number, self.maze.seed, SIMULATION_STEP)
+
+    def press(self, key):
+        """Presses a key (pygame.K_UP, K_DOWN, K_LEFT, K_RIGHT or K_SPACE), as a KEYDOWN event would."""
+        self._record_event(key, True)
+        self.player.handle_key_down(key, self.maze.npcs)
+
+    def release(self, key):
+        self._record_event(key, False)
+        self.player.handle_key_up(key)
+
+    def _record_event(self, key, pressed):
+        if self.recording is not None:
+            event = encode_event(key, pressed)
+            if event is not None:
+                self._tick_events.append(event)
+
+    def state_hash(self):
+        """CRC32 of the game state: the tick, and the position, facing, health and FSM state of every entity."""
+        player = self.player
+        values = array('q', (self.ticks, player.grid_x, player.grid_y, FACING_DIRECTIONS.index(player.facing_direction),
+                             player.health, player.is_dead))
+        for npc in self.maze.npcs:
+            values.extend((npc.grid_x, npc.grid_y, FACING_DIRECTIONS.index(npc.facing_direction), npc.health,
+                           FSM_STATES.index(npc.fsm_state)))
+        return zlib.crc32(values.tobytes())
+
+    def step(self, dt=SIMULATION_STEP):
+        """Advances the game by dt seconds and updates won/lost."""
+        if self.recording is not None and dt != self.recording.dt:
+            raise ValueError(f"Recorded simulations step by {self.recording.dt} s, not {dt} s.")
+        self.player.update(dt, self.maze.npcs)
+        # Updates the NPCs (batched for hordes) and removes the dead ones
+        self.maze.update_npcs(dt, self.player)
+        self.ticks += 1
+        self.time += dt
+
+        # Check for game over or win conditions
+        if not self.lost and self.player.is_dead and self.player.death_timer > DEATH_SEQUENCE_DURATION:
+            self.lost = True
+        if not self.won and not self.maze.npcs:
+            self.won = True
+
+        if self.recording is not None:
+            self.recording.add_tick(self._tick_events, self.state_hash())
+            self._tick_events.clear()
+
+    def run(self, controller=None, max_ticks=DEFAULT_MAX_TICKS, dt=SIMULATION_STEP):
+        """
+        Steps until the level is won or lost, or max_ticks steps have been run in total.
+        controller(simulation) is called before every step to press and release keys.
+        Returns self.
+        """
+        while not self.done and self.ticks < max_ticks:
+            if controller:
+                controller(self)
+            self.step(dt)
+        return self
@@ -0,0 +1,79 @@
+# sprite_cache.py
+import threading
+import pygame
+
+# Process-wide frame cache shared by every Player and NPC instance.
+# Frames are keyed by (sheet path, frame rect, target size); decoded sheets are kept per path.
+_sheet_cache = {}
+_frame_cache = {}
+_frame_cache_stats = {"hits": 0, "misses": 0}
+# Sheets may be preloaded on the background asset loader while the main thread builds sprites.
+_frame_cache_lock = threading.RLock()
+
+def _get_sheet(path):
+    sheet = _sheet_cache.get(path)
+    if sheet is None:
+        sheet = pygame.image.load(path).convert_alpha()
+        _sheet_cache[path] = sheet
+    return sheet
+
+def get_frame(path, frame_rect, target_size):
+    """
+    Returns one frame cut from a sprite sheet and scaled to target_size.
+    Raises pygame.error (or ValueError for a rect outside the sheet) like the direct calls would.
+    The returned surface is shared, so callers must never draw onto it.
+    """
+    key = (path, tuple(frame_rect), tuple(target_size))
+    with _frame_cache_lock:
+        frame = _frame_cache.get(key)
+        if frame is not None:
+            _frame_cache_stats["hits"] += 1
+            return frame
+
+        _frame_cache_stats["misses"] += 1
+        frame = pygame.transform.scale(_get_sheet(path).subsurface(frame_rect), target_size)
+        _frame_cache[key] = frame
+        return frame
+
+def load_frames(path, frame_rects, target_size):
+    """Returns an immutable tuple of shared frames, one per rect, all scaled to target_size."""
+    return tuple(get_frame(path, rect, target_size) for rect in frame_rects)
+
+def get_sprite_cache_stats():
+    """Returns the frame cache hit and miss counts and the number of cached frames and sheets."""
+    return {"hits": _frame_cache_stats["hits"], "misses": _frame_cache_stats["misses"],
+            "frames": len(_frame_cache), "sheets": len(_sheet_cache)}
+
+def clear_sprite_cache():
+    """Drops every cached sheet, frame and variant and resets the counters."""
+    with _frame_cache_lock:
+        _sheet_cache.clear()
+        _frame_cache.clear()
+        _frame_cache_stats["hits"] = _frame_cache_stats["misses"] = 0
+    clear_sprite_variants()
+
+# Flipped and scaled copies of animation frames, keyed by (frame, flip, scale).
+# Frames are never modified after loading, so a variant stays valid for as long as its frame lives.
+_variant_cache = {}
+
+def get_sprite_variant(frame, flip=False, scale=1.0):
+    """
+    Returns the frame mirrored horizontally (flip) and/or scaled by a factor.
+    Each variant is generated on first use and then served from the cache.
+    """
+    if not flip and scale == 1.0:
+        return frame
+
+    key = (frame, flip, scale)
+    variant = _variant_cache.get(key)
+    if variant is None:
+        variant = pygame.transform.flip(frame, True, False) if flip else frame
+        if scale != 1.0:
+            w, h = frame.get_size()
+            variant = pygame.transform.scale(variant, (int(w * scale), int(h * scale)))
+        _variant_cache[key] = variant
+    return variant
+
+def clear_sprite_variants():
+    """Empties the variant cache, releasing the frames it keeps alive."""
+    _variant_cache.clear()
@@ -0,0 +1,49 @@
+# text_cache.py
+from collections import OrderedDict
+import pygame
+
+FONT_PATH = "./assets/font.ttf"
+TEXT_CACHE_SIZE = 256 # Rendered strings kept before the least recently used one is evicted
+
+_font_cache = {}
+_text_cache = OrderedDict()
+
+def get_font(path, size):
+    """Returns the font at path in the given size, opening the file only once per (path, size)."""
+    key = (path, size)
+    font = _font_cache.get(key)
+    if font is None:
+        font = pygame.font.Font(path, size)
+        _font_cache[key] = font
+    return font
+
+def get_sys_font(name, size, bold=False):
+    """Cached counterpart of pygame.font.SysFont, used as the fallback when the custom font is missing."""
+    key = ("sys:" + name, size, bold)
+    font = _font_cache.get(key)
+    if font is None:
+        font = pygame.font.SysFont(name, size, bold=bold)
+        _font_cache[key] = font
+    return font
+
+def render_text(font, text, color, antialias=True):
+    """
+    Returns font.render(text, antialias, color), memoised by (font, text, colour, antialias).
+    The surface is shared between callers and must not be drawn onto.
+    """
+    key = (font, text, tuple(color), antialias)
+    surface = _text_cache.get(key)
+    if surface is not None:
+        _text_cache.move_to_end(key)
+        return surface
+
+    surface = font.render(text, antialias, color)
+    _text_cache[key] = surface
+    if len(_text_cache) > TEXT_CACHE_SIZE:
+        _text_cache.popitem(last=False)
+    return surface
+
+def clear_text_cache():
+    """Drops every cached font and rendered string."""
+    _font_cache.clear()
+    _text_cache.clear()